@@ -1,9 +1,11 @@
 import streamlit as st
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import sys
 import importlib.util
+from core.db import get_client, mongo_uri
+from core.enrollments import get_enrollment_index
+from core.indexes import bootstrap_indexes
 
 # Load environment variables
 load_dotenv()
@@ -17,18 +19,21 @@ st.set_page_config(
 )
 
 # MongoDB connection
-CONNECTION_STRING = os.getenv("MONGO_DB_URI")
-if not CONNECTION_STRING:
+if not mongo_uri():
     st.error("MongoDB connection string not found. Please set it in the .env file.")
     st.stop()
 
-client = MongoClient(CONNECTION_STRING)
+# Process-wide client; reruns, sessions and the views share its connection pool
+client = get_client()
+bootstrap_indexes(client)
 
 # Databases and collections
 master_db = client["master_db"]
 students_collection = master_db["students"]
 quiz_db = client["quiz-db"]
 courses_collection = quiz_db["courses"]
+# student -> course databases, for the Quizzes page
+enrollment_index = get_enrollment_index(master_db)
 
 # Initialize session state for navigation
 if "current_page" not in st.session_state:
@@ -101,50 +106,57 @@ def show_enrolled_courses():
         st.sidebar.write("You are not enrolled in any courses.")
 
 def get_enrolled_courses(student_id):
-    """Fetch enrolled courses based on course IDs."""
-    student = students_collection.find_one({"student_id": student_id})
-    if not student:
-        return []
-
-    course_ids = student.get("enrolled_courses", [])
-    courses = []
-
-    for course_id in course_ids:
-        course = courses_collection.find_one({"course_id": course_id})
-        if course:
-            courses.append((course_id, course["course_name"]))
+    """Fetch enrolled courses based on course IDs, cached for the session until the next enrollment."""
+    cached = st.session_state.get("enrolled_courses")
+    if cached is not None and cached[0] == student_id:
+        return cached[1]
+
+    student = students_collection.find_one({"student_id": student_id}, {"_id": 0, "enrolled_courses": 1})
+    course_ids = (student or {}).get("enrolled_courses", [])
+
+    # One round trip for all courses, kept in enrollment order
+    names = {
+        course["course_id"]: course["course_name"]
+        for course in courses_collection.find(
+            {"course_id": {"$in": course_ids}}, {"_id": 0, "course_id": 1, "course_name": 1}
+        )
+    } if course_ids else {}
+    courses = [(course_id, names[course_id]) for course_id in course_ids if course_id in names]
 
+    st.session_state["enrolled_courses"] = (student_id, courses)
     return courses
 
 def enroll_in_course(student_id, course_id):
     """Enroll a student in a course using course_id and push to subj DB."""
-    course = courses_collection.find_one({"course_id": course_id})
+    course = courses_collection.find_one(
+        {"course_id": course_id}, {"_id": 0, "course_id": 1, "course_name": 1, "db_name": 1}
+    )
     if not course:
         return None  # Invalid course ID
 
     course_name = course["course_name"]
-    student = students_collection.find_one({"student_id": student_id})
-
-    if not student:
-        students_collection.insert_one({
-            "student_id": student_id,
-            "enrolled_courses": [course_id]
-        })
-    elif course_id not in student["enrolled_courses"]:
-        students_collection.update_one(
-            {"student_id": student_id},
-            {"$push": {"enrolled_courses": course_id}}
-        )
-    else:
+
+    # Creates the student's record on first enrollment; nothing modified means already enrolled
+    result = students_collection.update_one(
+        {"student_id": student_id},
+        {"$addToSet": {"enrolled_courses": course_id}},
+        upsert=True,
+    )
+    if result.upserted_id is None and result.modified_count == 0:
         return "already_enrolled"
 
+    enrollment_index.enroll(student_id, course)
+    # The sidebar lists the new course on the next rerun
+    st.session_state.pop("enrolled_courses", None)
+
     # Push student_id to subj.<enroll_stud> collection
-    subj_db = client[course_name.lower()]  # lowercase to match db naming style
+    subj_db = client[course["db_name"]]  # the sanitized name the course database was created with
     enroll_stud_collection = subj_db["enroll_stud"]
-    
-    # Avoid duplicate entries
-    if not enroll_stud_collection.find_one({"student_id": student_id}):
-        enroll_stud_collection.insert_one({"student_id": student_id})
+
+    # Upsert avoids duplicate entries without a separate lookup
+    enroll_stud_collection.update_one(
+        {"student_id": student_id}, {"$setOnInsert": {"student_id": student_id}}, upsert=True
+    )
 
     return course_name
 
@@ -0,0 +1,194 @@
+"""Import-time profile of the Streamlit apps' cold start and of each page, via python -X importtime.
+
+The module-level imports of each app script are what every cold start pays
+(e.g. opening the Login page). Imports inside an `if selected == "<page>"`
+branch, and the student_views modules Student.py loads, are only paid when
+that page is opened; each page is measured on top of the app's cold start.
+Every measurement runs in a fresh interpreter.
+
+    python benchmarks/bench_import_time.py --runs 5
+    python benchmarks/bench_import_time.py --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+APPS = {
+    "teacher": "teacher.py",
+    "student": "Student.py",
+    "gaya_demo": os.path.join("testing-and-demos", "gaya_demo.py"),
+}
+# Pages Student.py loads from files instead of branching on `selected`
+STUDENT_VIEWS = os.path.join("student_views", "*.py")
+# Heaviest modules listed per measurement
+TOP_MODULES = 8
+
+
+def _imported_modules(nodes):
+    modules = []
+    for node in nodes:
+        for child in ast.walk(node):
+            if isinstance(child, ast.Import):
+                modules.extend(alias.name for alias in child.names)
+            elif isinstance(child, ast.ImportFrom) and child.module and not child.level:
+                modules.append(child.module)
+    return list(dict.fromkeys(modules))
+
+
+def _page_name(test):
+    # Matches `selected == "<page>"`, also inside `... and st.session_state.logged_in`
+    for node in ast.walk(test):
+        if (isinstance(node, ast.Compare) and isinstance(node.left, ast.Name) and node.left.id == "selected"
+                and isinstance(node.comparators[0], ast.Constant)):
+            return node.comparators[0].value
+    return None
+
+
+def app_imports(path):
+    """(cold-start modules, {page: page modules}) for one Streamlit script."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    startup, pages = [], {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            startup.extend(_imported_modules([node]))
+            continue
+        # Walk if/elif chains on the selected page
+        while isinstance(node, ast.If):
+            page = _page_name(node.test)
+            if page is not None:
+                pages.setdefault(page, []).extend(_imported_modules(node.body))
+            node = node.orelse[0] if len(node.orelse) == 1 else None
+    return list(dict.fromkeys(startup)), {page: list(dict.fromkeys(mods)) for page, mods in pages.items()}
+
+
+def student_view_imports():
+    views = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, STUDENT_VIEWS))):
+        startup, _ = app_imports(path)
+        views[os.path.splitext(os.path.basename(path))[0]] = startup
+    return views
+
+
+def _import_script(preloaded, measured):
+    # Missing optional packages are reported rather than failing the run
+    return "\n".join([
+        "import importlib, sys",
+        f"sys.path.insert(0, {ROOT!r})",
+        "missing, measuring = [], False",
+        f"for name in {preloaded!r} + ['__measure__'] + {measured!r}:",
+        "    if name == '__measure__':",
+        "        sys.stderr.write('__measure__\\n')",
+        "        measuring = True",
+        "        continue",
+        "    try:",
+        "        importlib.import_module(name)",
+        "    except Exception as e:",
+        "        if measuring:",
+        "            missing.append(f'{name}: {type(e).__name__}')",
+        "print(repr(missing))",
+    ])
+
+
+def measure(preloaded, measured):
+    """Microseconds to import `measured` in a fresh interpreter after `preloaded`, plus the heaviest modules."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _import_script(preloaded, measured)],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    stderr = completed.stderr.split("__measure__\n", 1)[-1]
+    total, modules = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Nested imports are indented and already counted in their parent's cumulative time
+        if name[1:2] != " ":
+            total += int(cumulative)
+            modules.append((name.strip(), int(cumulative)))
+    missing = ast.literal_eval(completed.stdout.strip().splitlines()[-1]) if completed.stdout.strip() else []
+    heaviest = sorted(modules, key=lambda item: item[1], reverse=True)[:TOP_MODULES]
+    return total, heaviest, missing
+
+
+def profile(preloaded, measured, runs):
+    samples, heaviest, missing = [], [], []
+    for _ in range(runs):
+        total, heaviest, missing = measure(preloaded, measured)
+        samples.append(total / 1000)
+    return {
+        "modules": measured,
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "heaviest_ms": {name: us / 1000 for name, us in heaviest},
+        "failed_imports": missing,
+    }
+
+
+def print_report(results, baseline=None):
+    previous = {(m["app"], m["page"]): m for m in (baseline or {}).get("measurements", [])}
+    print(f"\n  {'app':<11}{'page':<28}{'median ms':>11}" + ("  Δ" if baseline else ""))
+    for m in results["measurements"]:
+        line = f"  {m['app']:<11}{m['page'][:27]:<28}{m['median_ms']:>11.1f}"
+        old = previous.get((m["app"], m["page"]))
+        if old and old.get("median_ms"):
+            line += f"  {(m['median_ms'] - old['median_ms']) / old['median_ms'] * 100:+.1f}%"
+        print(line)
+        if m["failed_imports"]:
+            print(f"  {'':<11}not installed here: {', '.join(m['failed_imports'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--apps", nargs="*", default=list(APPS), choices=list(APPS), help="apps to profile")
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to show deltas against")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "import_time",
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "measurements": [],
+    }
+    for app in args.apps:
+        startup, pages = app_imports(os.path.join(ROOT, APPS[app]))
+        if app == "student":
+            pages.update(student_view_imports())
+        print(f"Profiling {app}...", file=sys.stderr)
+        results["measurements"].append({"app": app, "page": "cold start", **profile([], startup, args.runs)})
+        for page, modules in pages.items():
+            if modules:
+                results["measurements"].append({"app": app, "page": page, **profile(startup, modules, args.runs)})
+
+    output = args.output or os.path.join(RESULTS_DIR, f"import_time-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
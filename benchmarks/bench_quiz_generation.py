@@ -0,0 +1,224 @@
+"""End-to-end benchmark of the quiz generation path with offline stand-ins.
+
+Drives the streaming index build (parsing, chunking and embedding overlap, so
+they are timed together, plus the time until the first batch is searchable),
+retrieval, prompting, parsing and the Mongo insert over the sample PDF and
+synthetic PDFs of 50, 200 and 1000 pages, using the hashing embeddings, the
+fake chat model and mongomock. Each document runs in its own process so peak
+RSS is per document.
+
+    python benchmarks/bench_quiz_generation.py --runs 5
+    python benchmarks/bench_quiz_generation.py --pages 50 --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PDF = os.path.join(ROOT, "sample_docs", "Machine Learning Roadmap.pdf")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_PAGES = [50, 200, 1000]
+STAGES = ["first_batch", "indexing", "retrieval", "prompting", "parsing", "mongo_insert"]
+# Milestones inside another stage; reported but not added to the total
+NESTED_STAGES = {"first_batch"}
+PERCENTILES = [50, 90, 95, 99]
+
+
+def _configure_offline(scratch_dir):
+    # Must happen before any core module is imported; they read config at import time
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("EMBEDDINGS_PROVIDER", "hashing")
+    os.environ["INDEX_CACHE_DIR"] = os.path.join(scratch_dir, "faiss_index")
+    os.environ["EMBEDDING_STORE_DIR"] = os.path.join(scratch_dir, "embeddings")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(scratch_dir, "llm_responses.sqlite3")
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    summary = {f"p{pct}": percentile(samples, pct) for pct in PERCENTILES}
+    summary.update(mean=statistics.fmean(samples), max=max(samples), runs=len(samples))
+    return summary
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_once(pdf_path, num_questions, mongo_client):
+    from core.ingest import build_index_streaming
+    from core.llm_client import get_llm_client
+    from core.providers import get_base_embeddings
+    from core.quiz_generation import (
+        CHUNK_OVERLAP, CHUNK_SIZE, QUIZ_MODEL, STUFF_SYSTEM_PROMPT, build_quiz_prompt, format_docs, parse_quiz,
+        retrieve_context,
+    )
+    from core.context_packing import count_tokens
+
+    timings = {}
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        value = func()
+        timings[stage] = (time.perf_counter() - start) * 1000
+        return value
+
+    progress = {"pages": 0, "chunks": 0}
+    build_started = time.perf_counter()
+
+    def on_progress(pages_seen, chunks_indexed):
+        if not progress["chunks"]:
+            timings["first_batch"] = (time.perf_counter() - build_started) * 1000
+        progress.update(pages=pages_seen, chunks=chunks_indexed)
+
+    # The builder index_pdf_bytes() runs on a cache miss. Raw embeddings and no
+    # index cache, so every run pays the full parse, chunk and embed cost.
+    vector_store = timed("indexing", lambda: build_index_streaming(
+        pdf_path, get_base_embeddings(),
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, on_progress=on_progress,
+    ))
+
+    prompt = build_quiz_prompt(num_questions, "bench-quiz", "Benchmark quiz", "Benchmark Course", "BENCH101")
+    retrieved = timed("retrieval", lambda: retrieve_context(prompt, vector_store.as_retriever()))
+    context = format_docs(retrieved)
+    system = STUFF_SYSTEM_PROMPT.format(context=context)
+    text = timed("prompting", lambda: get_llm_client().complete(
+        prompt, provider="openai", model=QUIZ_MODEL, system=system,
+    ))
+    quiz, _ = timed("parsing", lambda: parse_quiz({"result": text}))
+    timed("mongo_insert", lambda: mongo_client["bench_course"]["quiz"].insert_one(dict(quiz)))
+
+    shape = {
+        "pages": progress["pages"],
+        "chunks": progress["chunks"],
+        "context_tokens": count_tokens(context, QUIZ_MODEL),
+        "questions": len(quiz.get("questions", [])),
+    }
+    return timings, shape
+
+
+def bench_document(pdf_path, runs, num_questions, scratch_dir):
+    """Benchmark one PDF in this process and return its result record."""
+    _configure_offline(scratch_dir)
+    import mongomock
+
+    mongo_client = mongomock.MongoClient()
+    samples = {stage: [] for stage in STAGES}
+    totals = []
+    shape = {}
+
+    # The first run warms imports and the process pool; it is not reported
+    run_once(pdf_path, num_questions, mongo_client)
+    for _ in range(runs):
+        timings, shape = run_once(pdf_path, num_questions, mongo_client)
+        for stage in STAGES:
+            samples[stage].append(timings[stage])
+        totals.append(sum(ms for stage, ms in timings.items() if stage not in NESTED_STAGES))
+
+    return {
+        "document": os.path.basename(pdf_path),
+        **shape,
+        "stages_ms": {stage: summarize(values) for stage, values in samples.items()},
+        "total_ms": summarize(totals),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_in_subprocess(pdf_path, args, scratch_dir):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--single", pdf_path,
+        "--runs", str(args.runs), "--questions", str(args.questions), "--scratch", scratch_dir,
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_report(results, baseline=None):
+    baseline_docs = {doc["document"]: doc for doc in (baseline or {}).get("documents", [])}
+    for doc in results["documents"]:
+        print(f"\n{doc['document']}: {doc['pages']} pages, {doc['chunks']} chunks, "
+              f"{doc.get('context_tokens', '?')} context tokens, peak RSS {doc['peak_rss_mb']:.1f} MB")
+        print(f"  {'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}" + ("  Δp50" if baseline else ""))
+        previous = baseline_docs.get(doc["document"], {}).get("stages_ms", {})
+        for stage in STAGES + ["total"]:
+            stats = doc["total_ms"] if stage == "total" else doc["stages_ms"][stage]
+            line = f"  {stage:<14}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['max']:>10.1f}"
+            old = baseline_docs.get(doc["document"], {}).get("total_ms") if stage == "total" else previous.get(stage)
+            if old and old.get("p50"):
+                line += f"  {(stats['p50'] - old['p50']) / old['p50'] * 100:+.1f}%"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="measured runs per document")
+    parser.add_argument("--questions", type=int, default=5, help="questions requested per quiz")
+    parser.add_argument("--pages", type=int, nargs="*", default=DEFAULT_PAGES, help="synthetic PDF sizes")
+    parser.add_argument("--skip-sample", action="store_true", help="skip the sample_docs PDF")
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to show p50 deltas against")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    parser.add_argument("--scratch", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(bench_document(args.single, args.runs, args.questions, args.scratch)))
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from synthetic_pdf import write_synthetic_pdf
+
+    with tempfile.TemporaryDirectory(prefix="quiz-bench-") as scratch_dir:
+        documents = [] if args.skip_sample else [SAMPLE_PDF]
+        for pages in args.pages:
+            documents.append(write_synthetic_pdf(os.path.join(scratch_dir, f"synthetic-{pages}p.pdf"), pages))
+
+        results = {
+            "benchmark": "quiz_generation",
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "questions": args.questions,
+            "documents": [],
+        }
+        for pdf_path in documents:
+            print(f"Benchmarking {os.path.basename(pdf_path)}...", file=sys.stderr)
+            results["documents"].append(run_in_subprocess(pdf_path, args, scratch_dir))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"quiz_generation-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
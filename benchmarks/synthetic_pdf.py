@@ -0,0 +1,89 @@
+import random
+
+# Vocabulary for filler text that reads roughly like course material
+TOPICS = [
+    "supervised learning", "gradient descent", "neural networks", "decision trees",
+    "feature scaling", "cross validation", "regularization", "overfitting",
+    "support vector machines", "clustering", "dimensionality reduction", "backpropagation",
+    "loss functions", "learning rate", "convolutional layers", "recurrent networks",
+    "tokenization", "word embeddings", "attention", "transformers",
+]
+VERBS = ["improves", "reduces", "describes", "depends on", "is used to estimate", "controls", "explains"]
+OBJECTS = [
+    "the generalization error", "the training loss", "model capacity", "the bias of the estimator",
+    "the variance of predictions", "the decision boundary", "the number of parameters",
+    "the quality of the representation", "convergence speed", "the validation accuracy",
+]
+
+LINES_PER_PAGE = 45
+CHARS_PER_LINE = 90
+
+
+def _sentence(rng):
+    return f"{rng.choice(TOPICS).capitalize()} {rng.choice(VERBS)} {rng.choice(OBJECTS)}."
+
+
+def _page_lines(rng, page_number):
+    lines = [f"Chapter {page_number // 10 + 1}, page {page_number + 1}: {rng.choice(TOPICS).title()}"]
+    current = ""
+    while len(lines) < LINES_PER_PAGE:
+        sentence = _sentence(rng)
+        if len(current) + len(sentence) + 1 > CHARS_PER_LINE:
+            lines.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    return lines
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_synthetic_pdf(path, num_pages, seed=0):
+    """Write a text-only PDF with num_pages pages of deterministic filler text."""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(None)
+    pages_id = add(None)
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for page_number in range(num_pages):
+        text_ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in _page_lines(rng, page_number):
+            text_ops.append(f"({_escape(line)}) Tj T*")
+        text_ops.append("ET")
+        stream = "\n".join(text_ops).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode("latin-1")
+        ))
+
+    objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("latin-1")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+
+    with open(path, "wb") as f:
+        f.write(output)
+    return path
@@ -0,0 +1,88 @@
+import os
+from collections import Counter
+
+import numpy as np
+
+from core.question_bank import DUPLICATE_THRESHOLD, content_terms, similarity
+from core.quiz_generation import (
+    QUIZ_MODEL, build_quiz_prompt, build_replacement_prompt, complete_with_context, quiz_defaults, retrieve_context,
+)
+from core.quiz_schema import loads_repaired, normalize_question
+from core.section_generation import get_index_documents
+
+# How many of the document's most common content words are looked up in the bank
+TOPIC_TERMS = 40
+# Banked questions fetched by term overlap before embedding similarity ranks them
+MAX_CANDIDATES = 200
+# Cosine similarity to the closest document chunk a banked question needs to be reused
+MIN_BANK_RELEVANCE = float(os.getenv("BANK_MIN_RELEVANCE", "0.75"))
+
+
+def document_terms(vector_store, limit=TOPIC_TERMS):
+    """The uploaded document's topic words: content words found in the most chunks."""
+    counts = Counter()
+    for doc in get_index_documents(vector_store):
+        counts.update(content_terms(doc.page_content))
+    return [term for term, _ in counts.most_common(limit)]
+
+
+def _question_text(question):
+    correct = [option["option_text"] for option in question.get("options", []) if option.get("is_correct")]
+    return " ".join([question.get("question", "")] + correct)
+
+
+def rank_by_document(candidates, vector_store, embeddings):
+    """Score candidates by cosine similarity to their closest chunk of the document, best first."""
+    if not candidates:
+        return []
+    vectors = np.asarray(embeddings.embed_documents([_question_text(c) for c in candidates]), dtype="float32")
+    distances, _ = vector_store.index.search(vectors, 1)
+    # Squared L2 between unit vectors; 1 - d / 2 is their cosine similarity
+    scores = 1 - distances[:, 0] / 2
+    return sorted(zip(scores.tolist(), candidates), key=lambda scored: scored[0], reverse=True)
+
+
+def pick_banked_questions(bank, vector_store, embeddings, num_questions, min_relevance=MIN_BANK_RELEVANCE):
+    """Up to num_questions banked questions about this document, without near-duplicates among them."""
+    candidates = bank.search_terms(document_terms(vector_store), limit=MAX_CANDIDATES)
+    picked, signatures = [], []
+    for score, candidate in rank_by_document(candidates, vector_store, embeddings):
+        if score < min_relevance or len(picked) == num_questions:
+            break
+        signature = np.asarray(candidate["signature"], dtype=np.uint64)
+        if any(similarity(signature, other) >= DUPLICATE_THRESHOLD for other in signatures):
+            continue
+        signatures.append(signature)
+        picked.append({
+            "question": candidate["question"],
+            "options": [dict(option) for option in candidate["options"]],
+            "from_bank": True,
+        })
+    return picked
+
+
+def generate_quiz_from_bank(bank, vector_store, embeddings, num_questions, quiz_id, test_description, subject,
+                            course_id, model=QUIZ_MODEL, bypass_cache=False):
+    """Fill a quiz from the course's question bank first; the LLM writes only the shortfall.
+
+    Returns (quiz, banked_count, docs), where docs is the context the new
+    questions were written from.
+    """
+    questions = pick_banked_questions(bank, vector_store, embeddings, num_questions)
+    banked_count = len(questions)
+
+    query = build_quiz_prompt(num_questions, quiz_id, test_description, subject, course_id)
+    docs = retrieve_context(query, vector_store.as_retriever())
+    shortfall = num_questions - banked_count
+    if shortfall:
+        prompt = build_replacement_prompt(shortfall, questions)
+        text = complete_with_context(prompt, docs, model=model, bypass_cache=bypass_cache)
+        new_questions = [q for q in loads_repaired(text).get("questions", []) if isinstance(q, dict)]
+        questions += new_questions[:shortfall]
+
+    quiz = dict(
+        quiz_defaults(quiz_id, test_description, subject, course_id),
+        title=f"{subject} - {quiz_id}",
+        questions=[normalize_question(question, index + 1) for index, question in enumerate(questions)],
+    )
+    return quiz, banked_count, docs
@@ -0,0 +1,126 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+from langchain.docstore.document import Document
+
+from core.llm_client import estimate_tokens
+
+# Tokens of retrieved document text stuffed into one generation prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# Chunks fetched by similarity before MMR picks among them
+MMR_FETCH_K = int(os.getenv("MMR_FETCH_K", "20"))
+# 1.0 ranks purely by relevance, 0.0 purely by novelty against the chunks already picked
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.6"))
+# Shortest shared text between two chunks that counts as splitter overlap
+MIN_OVERLAP_CHARS = 30
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model):
+    """tiktoken encoder for a model, built once per process; None if it can't be loaded."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # The BPE file is downloaded on first use; offline runs fall back to estimates
+        return None
+
+
+def count_tokens(text, model):
+    encoder = get_encoder(model)
+    if encoder is None:
+        return estimate_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def trim_overlap(text, context_texts, max_overlap=1000):
+    """Drop the start or end of text that already appears at the end or start of a context chunk."""
+    for other in context_texts:
+        # This chunk continues one already in the context
+        tail = other[-max_overlap:]
+        anchor = text[:MIN_OVERLAP_CHARS]
+        start = tail.find(anchor) if len(anchor) == MIN_OVERLAP_CHARS else -1
+        while start != -1:
+            if text.startswith(tail[start:]):
+                text = text[len(tail) - start:]
+                break
+            start = tail.find(anchor, start + 1)
+
+        # This chunk leads into one already in the context
+        head = other[:max_overlap]
+        anchor = text[-MIN_OVERLAP_CHARS:]
+        end = head.rfind(anchor) if len(anchor) == MIN_OVERLAP_CHARS else -1
+        while end != -1:
+            if text.endswith(head[:end + MIN_OVERLAP_CHARS]):
+                text = text[:len(text) - end - MIN_OVERLAP_CHARS]
+                break
+            end = head.rfind(anchor, 0, end)
+    return text.strip()
+
+
+def _embed_query(vector_store, text):
+    embed = vector_store.embedding_function
+    return embed.embed_query(text) if hasattr(embed, "embed_query") else embed(text)
+
+
+def _unit(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def pack_context(query, vector_store, model, budget=CONTEXT_TOKEN_BUDGET, fetch_k=MMR_FETCH_K, lambda_mult=MMR_LAMBDA,
+                 filter=None):
+    """Choose chunks for a prompt by maximal marginal relevance under a token budget.
+
+    Candidates come from the FAISS index with their stored vectors, so no
+    chunk is embedded again; filter(metadata), if given, excludes chunks like
+    the FAISS retriever's filter does. Each pick has the text it shares with
+    chunks already picked (the splitter's chunk_overlap) trimmed before its
+    tokens are counted; chunks that no longer fit are skipped. The result is
+    in document order.
+    """
+    query_vector = np.asarray(_embed_query(vector_store, query), dtype="float32")
+    # Look further when a filter may throw some of the nearest chunks away
+    search_k = fetch_k if filter is None else fetch_k * 4
+    _, indices = vector_store.index.search(query_vector[None, :], min(search_k, vector_store.index.ntotal))
+    candidates = [
+        (int(i), vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)])) for i in indices[0] if i != -1
+    ]
+    if filter is not None:
+        candidates = [(i, doc) for i, doc in candidates if filter(doc.metadata)]
+    candidates = candidates[:fetch_k]
+    if not candidates:
+        return []
+
+    positions = [i for i, _ in candidates]
+    docs = [doc for _, doc in candidates]
+    vectors = _unit(np.stack([vector_store.index.reconstruct(i) for i in positions]))
+    relevance = vectors @ _unit(query_vector)
+    similarity = vectors @ vectors.T
+
+    picked, texts, used = [], [], 0
+    remaining = list(range(len(docs)))
+    while remaining and used < budget:
+        redundancy = similarity[np.ix_(remaining, picked)].max(axis=1) if picked else np.zeros(len(remaining))
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = remaining.pop(int(np.argmax(scores)))
+
+        text = trim_overlap(docs[best].page_content, texts)
+        tokens = count_tokens(text, model) if text else 0
+        if not text or used + tokens > budget:
+            continue
+        picked.append(best)
+        texts.append(text)
+        used += tokens
+
+    packed = [
+        Document(page_content=text, metadata=dict(docs[index].metadata))
+        for index, text in zip(picked, texts)
+    ]
+    return sorted(packed, key=lambda doc: (doc.metadata.get("page", 0), doc.metadata.get("start_index", 0)))
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+import faiss
+from langchain.docstore.document import Document
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.vectorstores import FAISS
+
+from core.index_cache import embeddings_name
+from core.index_store import get_index_store
+
+# One FAISS index per course and embeddings model, shared by every session
+COURSE_INDEX_DIR = os.getenv("COURSE_INDEX_DIR", os.path.join(".cache", "course_index"))
+# Share of tombstoned chunks at which removed documents are dropped from the index for good
+COMPACT_RATIO = float(os.getenv("COURSE_INDEX_COMPACT_RATIO", "0.25"))
+
+MANIFEST = "manifest.json"
+
+
+def _safe_name(name):
+    return re.sub(r"[^a-zA-Z0-9_.-]", "_", str(name))
+
+
+def _empty_manifest(embeddings_name):
+    return {"embeddings": embeddings_name, "documents": {}, "updated_at": None}
+
+
+class CourseIndex:
+    """A course's document corpus as one FAISS index, persisted to local disk.
+
+    Documents are appended by merging in their own (cached) index, so adding
+    a document never re-embeds the others. Removing a document only marks it
+    as a tombstone in the manifest; retrieval filters tombstoned chunks out,
+    and they are deleted from the index once they make up COMPACT_RATIO of it.
+
+    The FAISS store itself lives in the shared IndexStore, so course indexes
+    count against the same memory budget as document indexes; an evicted
+    one is loaded from this directory again on next use.
+    """
+
+    def __init__(self, course_id, embeddings):
+        self.course_id = course_id
+        self.embeddings = embeddings
+        self.path = os.path.join(COURSE_INDEX_DIR, _safe_name(course_id), _safe_name(embeddings_name(embeddings)))
+        self.store_key = ("course", str(course_id), embeddings_name(embeddings))
+        self.lock = threading.RLock()
+        self.manifest = _empty_manifest(embeddings_name(embeddings))
+        self.loaded_mtime = None
+        self.reload()
+
+    def _manifest_path(self):
+        return os.path.join(self.path, MANIFEST)
+
+    def reload(self):
+        """Load the index from disk if another session or process saved a newer one."""
+        with self.lock:
+            manifest_path = self._manifest_path()
+            if not os.path.isfile(manifest_path):
+                return
+            mtime = os.path.getmtime(manifest_path)
+            if mtime == self.loaded_mtime:
+                return
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            # The next access loads the matching index from disk
+            get_index_store().discard(self.store_key)
+            self.loaded_mtime = mtime
+
+    def _load(self):
+        if not os.path.isfile(os.path.join(self.path, "index.faiss")):
+            return None
+        return FAISS.load_local(self.path, self.embeddings, allow_dangerous_deserialization=True)
+
+    @property
+    def vector_store(self):
+        """The course's FAISS store from the shared IndexStore; None while the course has no chunks."""
+        return get_index_store().get(self.store_key, load=self._load)
+
+    def _save(self, vector_store):
+        self.manifest["updated_at"] = datetime.utcnow().isoformat()
+        parent = os.path.dirname(self.path)
+        os.makedirs(parent, exist_ok=True)
+
+        # Build the new version next to the old one and swap directories, so a
+        # reader never sees an index and manifest from different versions
+        scratch = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+        try:
+            if vector_store is not None:
+                vector_store.save_local(scratch)
+            with open(os.path.join(scratch, MANIFEST), "w") as f:
+                json.dump(self.manifest, f, indent=2)
+            previous = None
+            if os.path.isdir(self.path):
+                previous = tempfile.mkdtemp(prefix=".old-", dir=parent)
+                os.replace(self.path, os.path.join(previous, "index"))
+            os.replace(scratch, self.path)
+            scratch = None
+            if previous:
+                shutil.rmtree(previous, ignore_errors=True)
+        finally:
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+        self.loaded_mtime = os.path.getmtime(self._manifest_path())
+        # On disk first, so an eviction from here on loses nothing
+        if vector_store is None:
+            get_index_store().discard(self.store_key)
+        else:
+            get_index_store().put(self.store_key, vector_store)
+
+    def documents(self, include_removed=False):
+        """Manifest entries for the course's documents, newest first."""
+        docs = [
+            dict(entry, doc_hash=doc_hash) for doc_hash, entry in self.manifest["documents"].items()
+            if include_removed or not entry.get("removed")
+        ]
+        return sorted(docs, key=lambda entry: entry["added_at"], reverse=True)
+
+    def live_hashes(self):
+        return {doc_hash for doc_hash, entry in self.manifest["documents"].items() if not entry.get("removed")}
+
+    def add_document(self, file_bytes, name, document_index):
+        """Append an indexed document; returns False if the course already has it.
+
+        document_index is the document's own FAISS store (from index_pdf_bytes);
+        its chunks and vectors are merged in without embedding anything again.
+        """
+        doc_hash = hashlib.sha256(file_bytes).hexdigest()
+        with self.lock:
+            self.reload()
+            entry = self.manifest["documents"].get(doc_hash)
+            if entry and not entry.get("removed"):
+                return False
+            vector_store = self.vector_store
+            if entry:
+                # Its chunks are still in the index; lifting the tombstone is enough
+                entry["removed"] = False
+                self._save(vector_store)
+                return True
+
+            # Work on a copy; the per-document index may be shared with other sessions
+            chunk_ids = list(document_index.index_to_docstore_id.values())
+            chunks = {}
+            for chunk_id in chunk_ids:
+                chunk = document_index.docstore.search(chunk_id)
+                chunks[chunk_id] = Document(
+                    page_content=chunk.page_content, metadata=dict(chunk.metadata, doc_hash=doc_hash, document=name),
+                )
+            document_index = FAISS(
+                self.embeddings, faiss.clone_index(document_index.index), InMemoryDocstore(chunks),
+                dict(document_index.index_to_docstore_id),
+            )
+
+            if vector_store is None:
+                vector_store = document_index
+            else:
+                vector_store.merge_from(document_index)
+
+            self.manifest["documents"][doc_hash] = {
+                "name": name,
+                "chunk_ids": chunk_ids,
+                "added_at": datetime.utcnow().isoformat(),
+                "removed": False,
+            }
+            self._save(vector_store)
+            return True
+
+    def remove_document(self, doc_hash):
+        """Tombstone a document; its chunks stop being retrieved immediately."""
+        with self.lock:
+            self.reload()
+            entry = self.manifest["documents"].get(doc_hash)
+            if not entry or entry.get("removed"):
+                return False
+            entry["removed"] = True
+            self._save(self._compact_if_needed(self.vector_store))
+            return True
+
+    def _compact_if_needed(self, vector_store):
+        """The store with tombstoned chunks deleted once there are enough of them."""
+        removed = [doc_hash for doc_hash, entry in self.manifest["documents"].items() if entry.get("removed")]
+        dead_ids = [chunk_id for doc_hash in removed for chunk_id in self.manifest["documents"][doc_hash]["chunk_ids"]]
+        total = vector_store.index.ntotal if vector_store is not None else 0
+        if not dead_ids or len(dead_ids) < COMPACT_RATIO * total:
+            return vector_store
+        if len(dead_ids) == total:
+            vector_store = None
+        else:
+            vector_store.delete(dead_ids)
+        for doc_hash in removed:
+            del self.manifest["documents"][doc_hash]
+        return vector_store
+
+    def as_retriever(self):
+        """Retriever over the live documents; None while the course has none."""
+        self.reload()
+        live = self.live_hashes()
+        vector_store = self.vector_store if live else None
+        if vector_store is None:
+            return None
+        return vector_store.as_retriever(search_kwargs={"filter": lambda metadata: metadata.get("doc_hash") in live})
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_course_index(course_id, embeddings):
+    """The process-wide CourseIndex for a course; only its manifest is held here, the index is in the IndexStore."""
+    key = (course_id, embeddings_name(embeddings))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = CourseIndex(course_id, embeddings)
+        return _indexes[key]
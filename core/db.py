@@ -0,0 +1,55 @@
+import os
+import threading
+
+# Connection pool per client; every session and view in the process shares it
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+# Connections kept warm so the first clicks after a quiet spell skip the handshake
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+# How long a request waits for a free pooled connection before failing instead of piling up
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+APP_NAME = "ai-smartclassroom"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def mongo_uri():
+    """The cluster the apps use; read on each call so load_dotenv() may run first."""
+    return os.getenv("MONGO_DB_URI")
+
+
+def get_client(uri=None):
+    """The process-wide MongoClient for a cluster, created on first use.
+
+    Streamlit reruns and the student views Student.py re-executes all get the
+    same client, so its pooled connections are reused rather than opened on
+    every click.
+    """
+    uri = uri or mongo_uri()
+    if not uri:
+        raise RuntimeError("MongoDB connection string not found. Please set MONGO_DB_URI in the .env file.")
+    with _clients_lock:
+        if uri not in _clients:
+            from pymongo import MongoClient
+            _clients[uri] = MongoClient(
+                uri,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                retryReads=True,
+                retryWrites=True,
+                appname=APP_NAME,
+            )
+        return _clients[uri]
+
+
+def get_database(name, uri=None):
+    return get_client(uri)[name]
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from core.provider_registry import get_provider_registry
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Shared chunk embeddings live here, one vector file + sidecar index per model
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", os.path.join(".cache", "embeddings"))
+
+
+def normalize_chunk(text):
+    """Normalize chunk text so trivially different copies of a handout hash the same."""
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def chunk_hash(text, model_name):
+    return hashlib.sha256(f"{model_name}\0{normalize_chunk(text)}".encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock across processes; the threads of one process also hold EmbeddingStore._lock."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingStore:
+    """Append-only store of chunk embeddings for one embedding model.
+
+    Vectors are rows of a float32 file read through a memory map; the sidecar
+    index maps each chunk hash to its row number, one "hash row" pair per line.
+    Appends take a lock file, so several app processes can share the files;
+    each picks up the others' rows from the index as it goes.
+    """
+
+    def __init__(self, model_name, directory=EMBEDDING_STORE_DIR):
+        safe_name = re.sub(r"[^a-zA-Z0-9_.-]", "_", model_name)
+        os.makedirs(directory, exist_ok=True)
+        self.model_name = model_name
+        self.vectors_path = os.path.join(directory, f"{safe_name}.f32")
+        self.index_path = os.path.join(directory, f"{safe_name}.idx")
+        self.lock_path = os.path.join(directory, f"{safe_name}.lock")
+        self.dim = None
+        self._rows = {}
+        self._index_offset = 0
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        with _file_lock(self.lock_path):
+            self._repair_files()
+            self._read_index()
+
+    def _repair_files(self):
+        """Undo writes a crash cut short; call with the file lock held."""
+        # A partial index line could parse as a hash with the wrong row
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r+b") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+        # A partial vector would shift every row appended after it
+        if self.dim is None and os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                header = f.readline().split()
+            if len(header) == 2 and header[0] == b"dim":
+                self.dim = int(header[1])
+        if self.dim and os.path.exists(self.vectors_path):
+            row_bytes = 4 * self.dim
+            size = os.path.getsize(self.vectors_path)
+            if size % row_bytes:
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(size - size % row_bytes)
+
+    def _read_index(self):
+        """Pick up index lines appended since the last read, by this or another process."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        # A line still being written is read next time
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8").splitlines():
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+            if parts[0] == "dim":
+                self.dim = int(parts[1])
+            else:
+                self._rows[parts[0]] = int(parts[1])
+        self._index_offset += end
+
+        # Ignore index lines whose vectors never made it to disk
+        stored_rows = self._stored_rows()
+        self._rows = {key: row for key, row in self._rows.items() if row < stored_rows}
+
+    def _stored_rows(self):
+        if not self.dim or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * self.dim)
+
+    def _open_matrix(self):
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._stored_rows(), self.dim))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get_many(self, hashes):
+        """Return {hash: vector} for the hashes already in the store."""
+        with self._lock:
+            if any(key not in self._rows for key in hashes):
+                # Another process may have embedded them since
+                self._read_index()
+            found = {key: self._rows[key] for key in hashes if key in self._rows}
+            if not found:
+                return {}
+            if self._matrix is None or self._matrix.shape[0] <= max(found.values()):
+                self._open_matrix()
+            return {key: self._matrix[row].tolist() for key, row in found.items()}
+
+    def add_many(self, items):
+        """Append (hash, vector) pairs that are not in the store yet."""
+        with self._lock, _file_lock(self.lock_path):
+            self._read_index()
+            new_items = [(key, vector) for key, vector in items if key not in self._rows]
+            if not new_items:
+                return
+
+            vectors = np.asarray([vector for _, vector in new_items], dtype=np.float32)
+            self._repair_files()
+            lines = []
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                lines.append(f"dim {self.dim}\n")
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+
+            # Vectors first: an index line must never point past the end of the vector file
+            start = self._stored_rows()
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            lines.extend(f"{key} {start + offset}\n" for offset, (key, _) in enumerate(new_items))
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+            self._read_index()
+
+            # The memory map is reopened lazily on the next read
+            self._matrix = None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(model_name):
+    """Process-wide store for a model, shared by every session and course."""
+    with _stores_lock:
+        if model_name not in _stores:
+            _stores[model_name] = EmbeddingStore(model_name)
+        return _stores[model_name]
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings model so only never-seen chunks reach the embedding API."""
+
+    def __init__(self, embeddings, store=None):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.store = store or get_embedding_store(self.model)
+
+    def embed_documents(self, texts):
+        hashes = [chunk_hash(text, self.model) for text in texts]
+        cached = self.store.get_many(hashes)
+
+        # Embed each missing chunk once, even if it repeats within this batch
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            with get_provider_registry().track(f"embeddings:{self.model}"):
+                new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self.store.add_many(fresh.items())
+            cached.update(fresh)
+
+        return [cached[key] for key in hashes]
+
+    def embed_query(self, text):
+        with get_provider_registry().track(f"embeddings:{self.model}"):
+            return self.embeddings.embed_query(text)
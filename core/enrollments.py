@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from pymongo import ASCENDING, UpdateOne
+
+
+class EnrollmentIndex:
+    """Which students take which courses: master_db.enrollments, one document per (student, course).
+
+    Each entry carries the course's database name, so a student's quiz
+    subjects are one indexed query instead of a scan of every database on
+    the cluster. Student.py's enroll_in_course keeps it up to date; students
+    enrolled before it existed are added by backfill().
+    """
+
+    def __init__(self, master_db):
+        self.collection = master_db["enrollments"]
+        self.collection.create_index([("student_id", ASCENDING), ("course_id", ASCENDING)], unique=True)
+
+    def enroll(self, student_id, course):
+        """Record an enrollment; returns False if the student was already enrolled."""
+        result = self.collection.update_one(
+            {"student_id": student_id, "course_id": course["course_id"]},
+            {"$setOnInsert": {
+                "db_name": course["db_name"],
+                "course_name": course["course_name"],
+                "enrolled_at": datetime.utcnow(),
+            }},
+            upsert=True,
+        )
+        return result.upserted_id is not None
+
+    def subjects(self, student_id):
+        """Database names of the student's courses, in enrollment order."""
+        entries = self.collection.find(
+            {"student_id": student_id}, {"_id": 0, "db_name": 1},
+        ).sort("enrolled_at", ASCENDING)
+        return list(dict.fromkeys(entry["db_name"] for entry in entries))
+
+    def backfill(self, student_id, students_collection, courses_collection):
+        """Add the student's enrollments recorded only in master_db.students; returns how many were added."""
+        student = students_collection.find_one({"student_id": student_id}, {"_id": 0, "enrolled_courses": 1})
+        course_ids = (student or {}).get("enrolled_courses", [])
+        if not course_ids:
+            return 0
+        courses = courses_collection.find(
+            {"course_id": {"$in": course_ids}}, {"_id": 0, "course_id": 1, "course_name": 1, "db_name": 1},
+        )
+        operations = [
+            UpdateOne(
+                {"student_id": student_id, "course_id": course["course_id"]},
+                {"$setOnInsert": {
+                    "db_name": course["db_name"],
+                    "course_name": course["course_name"],
+                    "enrolled_at": datetime.utcnow(),
+                }},
+                upsert=True,
+            )
+            for course in courses if course.get("db_name")
+        ]
+        if not operations:
+            return 0
+        return self.collection.bulk_write(operations, ordered=False).upserted_count
+
+
+_indexes = {}
+
+
+def get_enrollment_index(master_db):
+    """One EnrollmentIndex per process, so its index is ensured once."""
+    if master_db.name not in _indexes:
+        _indexes[master_db.name] = EnrollmentIndex(master_db)
+    return _indexes[master_db.name]
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from langchain.vectorstores import FAISS
+
+# Where built FAISS indexes are kept and how much disk they may use
+INDEX_CACHE_DIR = os.getenv("INDEX_CACHE_DIR", os.path.join(".cache", "faiss_index"))
+INDEX_CACHE_MAX_MB = int(os.getenv("INDEX_CACHE_MAX_MB", "512"))
+
+_lock = threading.Lock()
+
+
+def embeddings_name(embeddings):
+    """Name of the embedding model, part of every index key; two models must never share an index."""
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+def index_cache_key(file_bytes, chunk_size, chunk_overlap, embeddings=None):
+    """SHA-256 of the uploaded bytes plus everything that changes the built index."""
+    digest = hashlib.sha256(file_bytes)
+    digest.update(f"|chunk_size={chunk_size}|chunk_overlap={chunk_overlap}".encode("utf-8"))
+    if embeddings is not None:
+        digest.update(f"|embeddings={embeddings_name(embeddings)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def entry_path(key):
+    """Directory of the cached index stored under key."""
+    return os.path.join(INDEX_CACHE_DIR, key)
+
+
+def _entry_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _touch(path):
+    # The directory mtime doubles as the "last used" timestamp for LRU eviction
+    now = time.time()
+    os.utime(path, (now, now))
+
+
+def evict_lru(max_bytes=None):
+    """Remove least recently used indexes until the cache fits in max_bytes."""
+    if max_bytes is None:
+        max_bytes = INDEX_CACHE_MAX_MB * 1024 * 1024
+    if not os.path.isdir(INDEX_CACHE_DIR):
+        return []
+
+    entries = []
+    for key in os.listdir(INDEX_CACHE_DIR):
+        path = entry_path(key)
+        if os.path.isdir(path) and not key.startswith("."):
+            entries.append((os.path.getmtime(path), _entry_size(path), path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed.append(os.path.basename(path))
+    return removed
+
+
+def load_cached_index(key, embeddings):
+    """Return the FAISS store saved under key, or None on a cache miss."""
+    path = entry_path(key)
+    if not os.path.isfile(os.path.join(path, "index.faiss")):
+        return None
+    try:
+        vector_store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    except Exception:
+        # A half-written or incompatible entry is treated as a miss
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+    _touch(path)
+    return vector_store
+
+
+def save_index(key, vector_store):
+    """Persist a built FAISS store under key and trim the cache to its size limit."""
+    os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+    path = entry_path(key)
+
+    # Write to a scratch directory first so readers never see a partial index
+    scratch = tempfile.mkdtemp(prefix=".tmp-", dir=INDEX_CACHE_DIR)
+    try:
+        vector_store.save_local(scratch)
+        with _lock:
+            if os.path.isdir(path):
+                _touch(path)
+            else:
+                os.replace(scratch, path)
+                scratch = None
+            evict_lru()
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,177 @@
+import os
+import threading
+from collections import OrderedDict
+
+from core.index_cache import entry_path, index_cache_key, load_cached_index, save_index
+
+# RAM the process may spend on document indexes held for teacher sessions
+INDEX_STORE_MAX_MB = int(os.getenv("INDEX_STORE_MAX_MB", "512"))
+# Rough per-chunk cost of the docstore entry beyond its text
+CHUNK_OVERHEAD_BYTES = 500
+
+
+def estimate_index_bytes(vector_store):
+    """Approximate resident size of a FAISS store: float32 vectors plus chunk text."""
+    index = vector_store.index
+    docs = getattr(vector_store.docstore, "_dict", {}).values()
+    return index.ntotal * index.d * 4 + sum(len(doc.page_content) + CHUNK_OVERHEAD_BYTES for doc in docs)
+
+
+class IndexStore:
+    """Process-wide LRU of FAISS indexes under a memory budget.
+
+    Sessions keep only the index key; every session on the same document
+    (or course) shares one in-memory copy. When the budget is exceeded the
+    least recently used indexes are dropped from memory; they stay on disk
+    (the index cache for documents, the course's own directory for course
+    indexes) and are loaded again the next time a session asks for them.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = INDEX_STORE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.savers = {}
+        self.used = 0
+        self.lock = threading.Lock()
+        self.build_locks = {}
+
+    def _remove(self, key):
+        self.used -= self.sizes.pop(key)
+        self.savers.pop(key, None)
+        return self.entries.pop(key)
+
+    def _put(self, key, vector_store, saver=None):
+        """Insert or replace an entry; returns the evicted (key, vector_store, saver) to persist outside the lock."""
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = vector_store
+        self.sizes[key] = estimate_index_bytes(vector_store)
+        self.savers[key] = saver
+        self.used += self.sizes[key]
+
+        evicted = []
+        # The newest index always stays, even if it alone is over budget
+        while self.used > self.max_bytes and len(self.entries) > 1:
+            old_key = next(iter(self.entries))
+            saver = self.savers.get(old_key)
+            evicted.append((old_key, self._remove(old_key), saver))
+        return evicted
+
+    def put(self, key, vector_store, saver=None):
+        """Hold vector_store under key, e.g. after it changed size.
+
+        saver(key, vector_store), if given, runs when the entry is evicted; leave
+        it out for indexes whose owner already keeps them on disk.
+        """
+        with self.lock:
+            evicted = self._put(key, vector_store, saver)
+        _persist(evicted)
+
+    def discard(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def get(self, key, embeddings=None, load=None):
+        """The index for a key from memory, else from disk; None if it is gone.
+
+        load() reads it from disk; by default the key is a document's index
+        cache key and it comes from the index cache.
+        """
+        with self.lock:
+            vector_store = self.entries.get(key)
+            if vector_store is not None:
+                self.entries.move_to_end(key)
+                return vector_store
+        if load is None:
+            vector_store = load_cached_index(key, embeddings)
+            saver = _save_document_index
+        else:
+            vector_store, saver = load(), None
+        if vector_store is None:
+            return None
+        with self.lock:
+            if key in self.entries:
+                # Another session loaded it meanwhile; share that copy
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            evicted = self._put(key, vector_store, saver)
+        _persist(evicted)
+        return vector_store
+
+    def load_or_build(self, file_bytes, embeddings, build_index, chunk_size, chunk_overlap):
+        """Load a document's index from memory or the on-disk index cache, or build and cache it.
+
+        Returns (vector_store, key, cache_hit).
+        """
+        key = index_cache_key(file_bytes, chunk_size, chunk_overlap, embeddings)
+        with self.lock:
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+
+        # Two sessions uploading the same document build it once
+        with build_lock:
+            try:
+                vector_store = self.get(key, embeddings)
+                if vector_store is not None:
+                    return vector_store, key, True
+                vector_store = build_index()
+                if vector_store is None:
+                    return None, key, False
+                save_index(key, vector_store)
+                self.put(key, vector_store, _save_document_index)
+                return vector_store, key, False
+            finally:
+                # Only once the index is in memory, so a session arriving now finds it
+                with self.lock:
+                    if self.build_locks.get(key) is build_lock:
+                        del self.build_locks[key]
+
+    def stats(self):
+        with self.lock:
+            return {"indexes": len(self.entries), "bytes": self.used, "max_bytes": self.max_bytes}
+
+
+def _save_document_index(key, vector_store):
+    # The disk cache may have dropped it while it sat in memory
+    if not os.path.isdir(entry_path(key)):
+        save_index(key, vector_store)
+
+
+def _persist(evicted):
+    for key, vector_store, saver in evicted:
+        if saver is not None:
+            saver(key, vector_store)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_index_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IndexStore()
+        return _store
+
+
+def document_handle(key):
+    """What a session keeps for a single uploaded document's index."""
+    return {"kind": "document", "key": key}
+
+
+def course_handle(course_id):
+    """What a session keeps for a course's whole document library."""
+    return {"kind": "course", "course_id": course_id}
+
+
+def resolve_retriever(handle, embeddings):
+    """A retriever for a session's index handle; None if there is no handle or the index is gone."""
+    if not handle:
+        return None
+    if handle["kind"] == "course":
+        from core.course_index import get_course_index
+        return get_course_index(handle["course_id"], embeddings).as_retriever()
+    vector_store = get_index_store().get(handle["key"], embeddings)
+    return vector_store.as_retriever() if vector_store is not None else None
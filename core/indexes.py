@@ -0,0 +1,181 @@
+"""Indexes for the collections the apps query, and a check that the app's queries use them.
+
+    python -m core.indexes --ensure --verify
+
+--ensure creates the indexes in quiz-db, master_db and every course
+database listed in quiz-db.courses; --verify runs explain() on the app's
+query shapes and exits non-zero if any of them scans a whole collection.
+"""
+import argparse
+import sys
+import threading
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+QUIZ_DB = "quiz-db"
+MASTER_DB = "master_db"
+
+# (collection, keys, options). Unique only where the app already treats the
+# field as a key and checks for it before inserting; quizzes and scores are
+# inserted without a check, so a duplicate there must not fail the insert.
+SHARED_INDEXES = {
+    QUIZ_DB: [
+        ("teacher_meta", [("username", ASCENDING)], {"unique": True}),
+        ("student_meta", [("username", ASCENDING)], {"unique": True}),
+        ("courses", [("course_id", ASCENDING)], {"unique": True}),
+        ("courses", [("creator_name", ASCENDING)], {}),
+        ("quiz_jobs", [("job_id", ASCENDING)], {"unique": True}),
+        ("quiz_jobs", [("teacher_name", ASCENDING), ("course_id", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("quiz_jobs", [("status", ASCENDING), ("created_at", ASCENDING)], {}),
+        ("quiz_drafts", [("job_id", ASCENDING)], {"unique": True}),
+    ],
+    MASTER_DB: [
+        ("students", [("student_id", ASCENDING)], {"unique": True}),
+        ("enrollments", [("student_id", ASCENDING), ("course_id", ASCENDING)], {"unique": True}),
+    ],
+}
+COURSE_INDEXES = [
+    ("quiz", [("quiz_id", ASCENDING)], {}),
+    # A student's attempt at a quiz; the student_id prefix also serves the analysis page
+    ("test_scores", [("student_id", ASCENDING), ("quiz_id", ASCENDING)], {}),
+    # Every student's score on a quiz, for the teacher's visualization
+    ("test_scores", [("quiz_id", ASCENDING)], {}),
+    ("enroll_stud", [("student_id", ASCENDING)], {"unique": True}),
+]
+
+# The app's filtered reads as (database, collection, filter, sort); "course"
+# stands for each course database. Listing reads with no filter (all of a
+# course's quizzes) scan by design and are not checked.
+QUERY_SHAPES = [
+    (QUIZ_DB, "teacher_meta", {"username": "u", "password": "p"}, None),
+    (QUIZ_DB, "student_meta", {"username": "u"}, None),
+    (QUIZ_DB, "courses", {"course_id": "c"}, None),
+    (QUIZ_DB, "courses", {"course_id": {"$in": ["c1", "c2"]}}, None),
+    (QUIZ_DB, "courses", {"creator_name": "t"}, None),
+    (QUIZ_DB, "quiz_jobs", {"job_id": "j", "status": "queued"}, None),
+    (QUIZ_DB, "quiz_jobs", {"status": "queued"}, [("created_at", ASCENDING)]),
+    (QUIZ_DB, "quiz_jobs", {"teacher_name": "t", "course_id": "c"}, [("created_at", DESCENDING)]),
+    (QUIZ_DB, "quiz_drafts", {"job_id": "j"}, None),
+    (MASTER_DB, "students", {"student_id": "s"}, None),
+    (MASTER_DB, "enrollments", {"student_id": "s"}, [("enrolled_at", ASCENDING)]),
+    ("course", "quiz", {"quiz_id": "q"}, None),
+    ("course", "test_scores", {"student_id": "s", "quiz_id": "q"}, None),
+    ("course", "test_scores", {"student_id": "s"}, None),
+    ("course", "test_scores", {"quiz_id": "q"}, None),
+    ("course", "enroll_stud", {"student_id": "s"}, None),
+]
+
+
+def _create(db, specs):
+    """Create the indexes in specs; returns {"db.collection": [index name or error]}."""
+    report = {}
+    for collection, keys, options in specs:
+        name = f"{db.name}.{collection}"
+        try:
+            # Creating an index that already exists with the same keys and options is a no-op
+            created = db[collection].create_indexes([IndexModel(keys, **options)])
+            report.setdefault(name, []).extend(created)
+        except OperationFailure as e:
+            # e.g. existing duplicates block a unique index; the other indexes still get created
+            report.setdefault(name, []).append(f"failed: {(e.details or {}).get('errmsg', str(e))}")
+    return report
+
+
+def ensure_course_indexes(course_db):
+    return _create(course_db, COURSE_INDEXES)
+
+
+def ensure_shared_indexes(client):
+    report = {}
+    for db_name, specs in SHARED_INDEXES.items():
+        report.update(_create(client[db_name], specs))
+    return report
+
+
+def course_db_names(client):
+    return sorted(name for name in client[QUIZ_DB]["courses"].distinct("db_name") if name)
+
+
+def ensure_indexes(client, course_dbs=None):
+    """Create every index in quiz-db, master_db and the course databases (default: all courses)."""
+    report = ensure_shared_indexes(client)
+    for db_name in course_dbs if course_dbs is not None else course_db_names(client):
+        report.update(ensure_course_indexes(client[db_name]))
+    return report
+
+
+_bootstrapped = set()
+_bootstrap_lock = threading.Lock()
+
+
+def bootstrap_indexes(client):
+    """ensure_shared_indexes() once per process, for the apps to call at startup."""
+    with _bootstrap_lock:
+        if id(client) in _bootstrapped:
+            return
+        ensure_shared_indexes(client)
+        _bootstrapped.add(id(client))
+
+
+def _plan_stages(plan):
+    """Every stage name in an explain() plan tree, across classic and slot-based engine layouts."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def explain_stages(collection, query, sort=None):
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    return list(_plan_stages(cursor.explain().get("queryPlanner", {}).get("winningPlan", {})))
+
+
+def verify_indexes(client, course_dbs=None):
+    """Explain each query shape; returns [(namespace, filter, stages)] for the ones that use COLLSCAN."""
+    if course_dbs is None:
+        course_dbs = course_db_names(client)
+    failures = []
+    for db_name, collection, query, sort in QUERY_SHAPES:
+        for name in course_dbs if db_name == "course" else [db_name]:
+            stages = explain_stages(client[name][collection], query, sort)
+            if "COLLSCAN" in stages:
+                failures.append((f"{name}.{collection}", query, stages))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ensure", action="store_true", help="create missing indexes")
+    parser.add_argument("--verify", action="store_true", help="fail if an app query shape scans a collection")
+    parser.add_argument("--course-db", action="append", help="only these course databases (default: all courses)")
+    parser.add_argument("--uri", help="connection string (default: MONGO_DB_URI)")
+    args = parser.parse_args()
+    if not (args.ensure or args.verify):
+        parser.error("nothing to do; pass --ensure and/or --verify")
+
+    from dotenv import load_dotenv
+    from core.db import get_client
+    load_dotenv()
+    client = get_client(args.uri)
+
+    if args.ensure:
+        for namespace, indexes in sorted(ensure_indexes(client, args.course_db).items()):
+            print(f"{namespace}: {', '.join(indexes)}")
+    if args.verify:
+        failures = verify_indexes(client, args.course_db)
+        for namespace, query, stages in failures:
+            print(f"COLLSCAN {namespace} {query} -> {' > '.join(stages)}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print("All query shapes use an index.")
+
+
+if __name__ == "__main__":
+    main()
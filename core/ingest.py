@@ -0,0 +1,105 @@
+import queue
+import threading
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.vectorstores import FAISS
+
+from core.pdf_extract import iter_pdf_documents
+
+# Chunks embedded per request, and how many batches the parser may run ahead
+EMBED_BATCH_SIZE = 64
+MAX_PENDING_BATCHES = 4
+
+_DONE = object()
+
+
+def iter_chunks(pages, chunk_size=1000, chunk_overlap=200):
+    """Split pages as they arrive; chunks never span pages, same as split_documents."""
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for page in pages:
+        yield from text_splitter.split_documents([page])
+
+
+def iter_batches(items, batch_size=EMBED_BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _put(out_queue, item, stop):
+    """Put item unless the consumer stops first; returns False if it stopped."""
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(batches, out_queue, stop):
+    # Every put gives up once the consumer stops, so a consumer that failed
+    # with a full queue can't leave this thread blocked holding batches
+    try:
+        for batch in batches:
+            if not _put(out_queue, batch, stop):
+                return
+        _put(out_queue, _DONE, stop)
+    except Exception as e:
+        _put(out_queue, e, stop)
+
+
+def build_index_streaming(pdf_path, embeddings, chunk_size=1000, chunk_overlap=200,
+                          batch_size=EMBED_BATCH_SIZE, on_progress=None, pages=None):
+    """Build a FAISS store while the PDF is still being parsed.
+
+    A background thread parses and splits pages into bounded batches; this
+    thread embeds each batch as soon as it is ready, so memory stays flat and
+    the index holds retrievable chunks before the last page is read.
+    on_progress(pages_seen, chunks_indexed) is called after every batch.
+    Returns None if the document produced no text.
+    """
+    if pages is None:
+        pages = iter_pdf_documents(pdf_path)
+
+    pages_seen = set()
+
+    def tracked_pages():
+        for page in pages:
+            pages_seen.add(page.metadata.get("page", len(pages_seen)))
+            yield page
+
+    batches = iter_batches(iter_chunks(tracked_pages(), chunk_size, chunk_overlap), batch_size)
+    pending = queue.Queue(maxsize=MAX_PENDING_BATCHES)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(batches, pending, stop), daemon=True)
+    producer.start()
+
+    vector_store = None
+    chunks_indexed = 0
+    try:
+        while True:
+            batch = pending.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+
+            if vector_store is None:
+                vector_store = FAISS.from_documents(batch, embeddings)
+            else:
+                vector_store.add_documents(batch)
+            chunks_indexed += len(batch)
+
+            if on_progress:
+                on_progress(len(pages_seen), chunks_indexed)
+    finally:
+        stop.set()
+        producer.join(timeout=1)
+
+    return vector_store
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+# Uploaded PDFs are kept by content hash so queued jobs survive restarts
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(".cache", "uploads"))
+JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", "2"))
+# Workers renew the lease on their running jobs this often, and requeue
+# running jobs whose lease has expired (their worker has stopped)
+HEARTBEAT_SECONDS = int(os.getenv("QUIZ_JOB_HEARTBEAT_SECONDS", "30"))
+JOB_LEASE_SECONDS = int(os.getenv("QUIZ_JOB_LEASE_SECONDS", "120"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def save_upload(file_bytes):
+    """Store uploaded bytes under their SHA-256 and return the hash."""
+    pdf_hash = hashlib.sha256(file_bytes).hexdigest()
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = upload_path(pdf_hash)
+    if not os.path.exists(path):
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(file_bytes)
+        os.replace(temp_path, path)
+    return pdf_hash
+
+
+def upload_path(pdf_hash):
+    return os.path.join(UPLOAD_DIR, f"{pdf_hash}.pdf")
+
+
+def read_upload(pdf_hash):
+    with open(upload_path(pdf_hash), "rb") as f:
+        return f.read()
+
+
+def _run_quiz_job(job, report_progress):
+    # Imported on first use so starting the queue doesn't load langchain
+    from core.quiz_generation import run_quiz_job
+    return run_quiz_job(job, report_progress)
+
+
+class QuizJobQueue:
+    """Mongo-backed queue of quiz generation jobs served by a local worker pool.
+
+    Jobs live in quiz_jobs and finished quizzes in quiz_drafts, so a teacher can
+    close the tab and come back later. A running job holds a lease that its
+    worker renews every HEARTBEAT_SECONDS; once the lease runs out (the
+    process stopped or crashed) any queue, in this process or another, puts
+    the job back in line and runs it.
+    """
+
+    def __init__(self, db, run_job=_run_quiz_job, max_workers=JOB_WORKERS, heartbeat_seconds=HEARTBEAT_SECONDS):
+        self.jobs = db["quiz_jobs"]
+        self.drafts = db["quiz_drafts"]
+        self.run_job = run_job
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quiz-job")
+        self.lock = threading.Lock()
+        # Jobs handed to the executor and not finished yet, so a sweep doesn't submit them twice
+        self.scheduled = set()
+        self.stopped = threading.Event()
+        self.resume()
+        if heartbeat_seconds:
+            self.heartbeat = threading.Thread(
+                target=self._heartbeat_loop, args=(heartbeat_seconds,), name="quiz-job-heartbeat", daemon=True,
+            )
+            self.heartbeat.start()
+
+    def enqueue(self, teacher_name, course, file_bytes, quiz_id, test_description, num_questions, difficulty,
+                mode="standard"):
+        now = datetime.utcnow()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "teacher_name": teacher_name,
+            "course_id": course["course_id"],
+            "course_name": course["course_name"],
+            "db_name": course["db_name"],
+            "pdf_hash": save_upload(file_bytes),
+            "quiz_id": quiz_id,
+            "test_description": test_description,
+            "num_questions": num_questions,
+            "difficulty": difficulty,
+            "mode": mode,
+            "status": QUEUED,
+            "progress": 0,
+            "message": "Waiting for a worker",
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.jobs.insert_one(job)
+        self._schedule(job["job_id"])
+        return job["job_id"]
+
+    def _schedule(self, job_id):
+        with self.lock:
+            if job_id in self.scheduled:
+                return
+            self.scheduled.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def renew_leases(self):
+        """Extend the lease of every job this worker is running."""
+        now = datetime.utcnow()
+        self.jobs.update_many(
+            {"status": RUNNING, "worker": self.worker_id},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS)}},
+        )
+
+    def resume(self):
+        """Requeue running jobs whose lease expired, then schedule every queued job."""
+        now = datetime.utcnow()
+        self.jobs.update_many(
+            {"status": RUNNING, "$or": [
+                {"lease_expires_at": {"$lt": now}},
+                # Claimed before leases existed
+                {"lease_expires_at": {"$exists": False},
+                 "updated_at": {"$lt": now - timedelta(seconds=JOB_LEASE_SECONDS)}},
+            ]},
+            {"$set": {"status": QUEUED, "message": "Resumed after interruption", "updated_at": now},
+             "$unset": {"worker": "", "lease_expires_at": ""}},
+        )
+        for job in self.jobs.find({"status": QUEUED}, {"job_id": 1}).sort("created_at", 1):
+            self._schedule(job["job_id"])
+
+    def _heartbeat_loop(self, interval):
+        while not self.stopped.wait(interval):
+            try:
+                self.renew_leases()
+                self.resume()
+            except Exception:
+                # A dropped connection must not end the heartbeat; the next beat retries
+                traceback.print_exc()
+
+    def stop(self):
+        self.stopped.set()
+
+    def list_jobs(self, teacher_name, course_id=None, limit=50):
+        query = {"teacher_name": teacher_name}
+        if course_id:
+            query["course_id"] = course_id
+        return list(self.jobs.find(query, {"_id": 0}).sort("created_at", -1).limit(limit))
+
+    def get_draft(self, job_id):
+        return self.drafts.find_one({"job_id": job_id}, {"_id": 0})
+
+    def mark_draft(self, job_id, status):
+        self.drafts.update_one({"job_id": job_id}, {"$set": {"status": status, "updated_at": datetime.utcnow()}})
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        # A worker whose lease ran out no longer owns the job; its writes are dropped
+        self.jobs.update_one({"job_id": job_id, "worker": self.worker_id}, {"$set": fields})
+
+    def _run(self, job_id):
+        try:
+            self._claim_and_run(job_id)
+        finally:
+            with self.lock:
+                self.scheduled.discard(job_id)
+
+    def _claim_and_run(self, job_id):
+        # Claim the job atomically so two workers (or processes) never run it twice
+        now = datetime.utcnow()
+        job = self.jobs.find_one_and_update(
+            {"job_id": job_id, "status": QUEUED},
+            {"$set": {"status": RUNNING, "worker": self.worker_id, "message": "Starting", "updated_at": now,
+                      "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS)},
+             "$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return
+
+        def report_progress(progress, message):
+            self._update(job_id, progress=int(progress), message=message)
+
+        try:
+            quiz = self.run_job(job, report_progress)
+            self.drafts.update_one(
+                {"job_id": job_id},
+                {"$set": {
+                    "job_id": job_id,
+                    "teacher_name": job["teacher_name"],
+                    "course_id": job["course_id"],
+                    "db_name": job["db_name"],
+                    "quiz": quiz,
+                    "status": "pending_review",
+                    "created_at": datetime.utcnow(),
+                }},
+                upsert=True,
+            )
+            self._update(job_id, status=DONE, progress=100, message="Draft ready for review")
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status=FAILED, message="Generation failed", error=str(e))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue(db, run_job=_run_quiz_job):
+    """One queue and worker pool per process, shared by every teacher session.
+
+    The apps call this at startup so jobs left over from an earlier process
+    resume without waiting for someone to open the Quiz Generation page.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = QuizJobQueue(db, run_job)
+        return _queue
@@ -0,0 +1,82 @@
+from core.quiz_schema import QuizParseError, loads_repaired, parse_question_text
+
+
+class QuizStreamParser:
+    """Pulls finished question objects out of a quiz JSON response while it streams in.
+
+    feed() takes the next piece of model output and returns the questions whose
+    closing brace has arrived; result() parses the whole response at the end.
+    Only brackets outside string literals are tracked, so braces inside
+    question text don't confuse it.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.stack = []          # (bracket, key) for every open object/array
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        self.pending_key = None
+        self.question_start = None
+        self.questions = []
+
+    def _in_questions_array(self):
+        return len(self.stack) == 2 and self.stack[1] == ("[", "questions") and self.stack[0][0] == "{"
+
+    def feed(self, text):
+        self.buffer += text
+        completed = []
+
+        while self.position < len(self.buffer):
+            i = self.position
+            char = self.buffer[i]
+            self.position += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = self.buffer[self.string_start + 1:i]
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif char == ":":
+                self.pending_key = self.last_string
+            elif char == ",":
+                self.pending_key = None
+            elif char in "{[":
+                if char == "{" and self._in_questions_array():
+                    self.question_start = i
+                self.stack.append((char, self.pending_key))
+                self.pending_key = None
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if char == "}" and self.question_start is not None and self._in_questions_array():
+                    question = self._parse_question(self.buffer[self.question_start:i + 1])
+                    self.question_start = None
+                    if question is not None:
+                        self.questions.append(question)
+                        completed.append(question)
+
+        return completed
+
+    def _parse_question(self, text):
+        # Numbered by position, as normalize_quiz() numbers the finished quiz
+        return parse_question_text(text, len(self.questions) + 1)
+
+    def result(self):
+        """Parse the complete response, falling back to the questions seen so far."""
+        try:
+            return loads_repaired(self.buffer)
+        except QuizParseError:
+            if not self.questions:
+                raise
+            return {"questions": self.questions}
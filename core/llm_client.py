@@ -0,0 +1,416 @@
+import asyncio
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+
+from core.provider_registry import async_http_client, get_provider_registry
+from core.response_cache import delete_response, get_response, put_response, response_cache_key
+
+# Per-provider limits, overridable with e.g. OPENAI_MAX_CONCURRENCY / OPENAI_RPM / OPENAI_TPM
+DEFAULT_LIMITS = {
+    "openai": {"max_concurrency": 8, "rpm": 500, "tpm": 30000},
+    "gemini": {"max_concurrency": 4, "rpm": 60, "tpm": 120000},
+}
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30.0"))
+# "fake" swaps every provider for the offline stand-in in core/providers.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "live")
+# Assumed completion size when a call doesn't set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+_END = object()
+
+_RETRYABLE_NAMES = ("RateLimit", "ResourceExhausted", "Timeout", "APIConnection",
+                    "InternalServer", "ServiceUnavailable")
+
+
+def estimate_tokens(prompt):
+    if isinstance(prompt, str):
+        return max(1, len(prompt) // 4)
+    # Gemini prompts may mix text with images; count the text parts only
+    return sum(estimate_tokens(part) for part in prompt if isinstance(part, str)) or 1
+
+
+def _limit(provider, name):
+    value = os.getenv(f"{provider.upper()}_{name.upper()}")
+    return int(value) if value else DEFAULT_LIMITS.get(provider, DEFAULT_LIMITS["openai"])[name]
+
+
+def is_retryable(error):
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429 or (isinstance(status, int) and status >= 500):
+        return True
+    return any(name in type(error).__name__ for name in _RETRYABLE_NAMES)
+
+
+def is_rate_limit(error):
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status == 429 or "RateLimit" in type(error).__name__ or "ResourceExhausted" in type(error).__name__
+
+
+def _cache_key(model, prompt, system, context_ids, max_tokens, response_format):
+    # The backend is part of the key so offline runs never answer live requests
+    return response_cache_key(model, prompt, system, context_ids, backend=LLM_BACKEND,
+                              max_tokens=max_tokens, response_format=response_format)
+
+
+def cacheable(text, validate=None):
+    """Whether a response may be stored in (or served from) the response cache.
+
+    validate(text) is the caller's parser; a response it raises on is not
+    cached, so the next identical request samples the model again instead of
+    replaying the same broken output.
+    """
+    if not text:
+        return False
+    if validate is None:
+        return True
+    try:
+        validate(text)
+    except Exception:
+        return False
+    return True
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute; acquire() waits for enough units."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(float(amount), self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class KeyPool:
+    """Round-robin API keys, skipping keys that were rate limited recently."""
+
+    def __init__(self, keys):
+        self.keys = [key for key in keys if key]
+        self.cooldown_until = {}
+        self.position = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def next_key(self):
+        if not self.keys:
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.keys)):
+            key = self.keys[self.position % len(self.keys)]
+            self.position += 1
+            if self.cooldown_until.get(key, 0) <= now:
+                return key
+        # Every key is cooling down: use the one that frees up first
+        return min(self.keys, key=lambda k: self.cooldown_until.get(k, 0))
+
+    def has_available(self):
+        now = time.monotonic()
+        return any(self.cooldown_until.get(key, 0) <= now for key in self.keys)
+
+    def cool_down(self, key, seconds):
+        if key:
+            self.cooldown_until[key] = time.monotonic() + seconds
+
+
+def _env_keys(provider):
+    pooled = os.getenv(f"{provider.upper()}_API_KEYS", "")
+    keys = [key.strip() for key in pooled.split(",") if key.strip()]
+    return keys or [os.getenv(f"{provider.upper()}_API_KEY")]
+
+
+class _ProviderState:
+    def __init__(self, provider):
+        self.provider = provider
+        self.semaphore = asyncio.Semaphore(_limit(provider, "max_concurrency"))
+        self.requests = TokenBucket(_limit(provider, "rpm"))
+        self.tokens = TokenBucket(_limit(provider, "tpm"))
+        self.keys = KeyPool(_env_keys(provider))
+
+    def next_key(self):
+        """The key for the next call; the fake backend needs none."""
+        if not self.keys and LLM_BACKEND != "fake":
+            name = self.provider.upper()
+            raise RuntimeError(
+                f"No API key configured for provider {self.provider}. "
+                f"Please set {name}_API_KEY or {name}_API_KEYS in the .env file."
+            )
+        return self.keys.next_key()
+
+
+class LLMClient:
+    """Shared async LLM client with concurrency limits, rate limits and retries.
+
+    Coroutines run on one background event loop, so limits hold across every
+    Streamlit session in the process. Sync code calls complete() /
+    complete_many(); async code awaits acomplete().
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client", daemon=True)
+        self.thread.start()
+        self._providers = {}
+        self.registry = get_provider_registry()
+
+    def _state(self, provider):
+        if provider not in self._providers:
+            self._providers[provider] = _ProviderState(provider)
+        return self._providers[provider]
+
+    def _openai(self, api_key):
+        def build():
+            from openai import AsyncOpenAI
+            # Every key's client goes through one connection pool; the SDK's own
+            # retries are disabled since backoff is handled here with the shared limits
+            http = self.registry.client("http:openai-async", async_http_client)
+            return AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http)
+
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+        return self.registry.client(f"openai:{key_id}", build)
+
+    def _gemini(self, model, api_key):
+        def build():
+            from google.generativeai import GenerativeModel, configure
+            # google.generativeai is configured process-wide, so Gemini uses one key
+            configure(api_key=api_key)
+            return GenerativeModel(model)
+
+        return self.registry.client(f"gemini:{model}", build)
+
+    async def _call(self, provider, model, prompt, api_key, system=None, max_tokens=None, response_format=None):
+        if LLM_BACKEND == "fake":
+            from core.providers import fake_complete
+            return await fake_complete(prompt, system)
+        if provider == "openai":
+            messages = [{"role": "system", "content": system}] if system else []
+            messages.append({"role": "user", "content": prompt})
+            kwargs = {"model": model, "messages": messages}
+            if max_tokens:
+                kwargs["max_tokens"] = max_tokens
+            if response_format:
+                kwargs["response_format"] = response_format
+            response = await self._openai(api_key).chat.completions.create(**kwargs)
+            return response.choices[0].message.content
+        if provider == "gemini":
+            contents = prompt if isinstance(prompt, list) else [prompt]
+            if system:
+                contents = [system] + contents
+            response = await self._gemini(model, api_key).generate_content_async(contents)
+            return response.text
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    async def _stream(self, provider, model, prompt, api_key, system=None, max_tokens=None):
+        if LLM_BACKEND == "fake":
+            from core.providers import fake_stream
+            async for delta in fake_stream(prompt, system):
+                yield delta
+            return
+        if provider == "openai":
+            messages = [{"role": "system", "content": system}] if system else []
+            messages.append({"role": "user", "content": prompt})
+            kwargs = {"model": model, "messages": messages, "stream": True}
+            if max_tokens:
+                kwargs["max_tokens"] = max_tokens
+            stream = await self._openai(api_key).chat.completions.create(**kwargs)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            return
+        if provider == "gemini":
+            contents = prompt if isinstance(prompt, list) else [prompt]
+            if system:
+                contents = [system] + contents
+            response = await self._gemini(model, api_key).generate_content_async(contents, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+            return
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    async def _backoff(self, state, api_key, error, attempt):
+        delay = _retry_after(error) or min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+        if is_rate_limit(error):
+            state.keys.cool_down(api_key, delay)
+            # Another key may be free right away
+            if state.keys.has_available():
+                return
+        await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    async def acomplete(self, prompt, provider="openai", model="gpt-4", system=None,
+                        max_tokens=None, response_format=None,
+                        use_cache=False, bypass_cache=False, context_ids=None, validate=None):
+        """Complete one prompt, waiting for a concurrency slot and rate-limit budget.
+
+        With use_cache, identical requests (model, prompt, system and the IDs of
+        the retrieved context) are answered from the response cache;
+        bypass_cache skips the lookup but still stores the fresh response.
+        Only responses validate(text) accepts are cached; see cacheable().
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = _cache_key(model, prompt, system, context_ids, max_tokens, response_format)
+            if not bypass_cache:
+                cached = await self._cached(cache_key, validate)
+                if cached is not None:
+                    return cached
+
+        text = await self._acomplete_uncached(prompt, provider, model, system, max_tokens, response_format)
+        if cache_key and cacheable(text, validate):
+            await asyncio.to_thread(put_response, cache_key, text)
+        return text
+
+    async def _cached(self, cache_key, validate):
+        cached = await asyncio.to_thread(get_response, cache_key)
+        if cached is None or cacheable(cached, validate):
+            return cached
+        # Stored before the caller validated responses; drop it and ask the model again
+        await asyncio.to_thread(delete_response, cache_key)
+        return None
+
+    async def _acomplete_uncached(self, prompt, provider, model, system, max_tokens, response_format):
+        state = self._state(provider)
+        budget = estimate_tokens(prompt) + estimate_tokens(system or "") + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+        for attempt in range(MAX_RETRIES + 1):
+            api_key = state.next_key()
+            await state.requests.acquire(1)
+            await state.tokens.acquire(budget)
+            try:
+                async with state.semaphore:
+                    with self.registry.track(f"{provider}:{model}"):
+                        return await self._call(provider, model, prompt, api_key, system, max_tokens, response_format)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not is_retryable(e):
+                    raise
+                await self._backoff(state, api_key, e, attempt)
+
+    async def astream(self, prompt, provider="openai", model="gpt-4", system=None, max_tokens=None,
+                      use_cache=False, bypass_cache=False, context_ids=None, validate=None):
+        """Yield completion text as it is generated.
+
+        Failures before the first chunk are retried like acomplete(); once text
+        has been handed out the error is raised to the caller. A cached
+        response is yielded in one piece.
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = _cache_key(model, prompt, system, context_ids, max_tokens, None)
+            if not bypass_cache:
+                cached = await self._cached(cache_key, validate)
+                if cached is not None:
+                    yield cached
+                    return
+
+        parts = []
+        async for delta in self._astream_uncached(prompt, provider, model, system, max_tokens):
+            parts.append(delta)
+            yield delta
+        text = "".join(parts)
+        if cache_key and cacheable(text, validate):
+            await asyncio.to_thread(put_response, cache_key, text)
+
+    async def _astream_uncached(self, prompt, provider, model, system, max_tokens):
+        state = self._state(provider)
+        budget = estimate_tokens(prompt) + estimate_tokens(system or "") + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+        for attempt in range(MAX_RETRIES + 1):
+            api_key = state.next_key()
+            await state.requests.acquire(1)
+            await state.tokens.acquire(budget)
+            started = False
+            try:
+                async with state.semaphore:
+                    with self.registry.track(f"{provider}:{model}"):
+                        async for delta in self._stream(provider, model, prompt, api_key, system, max_tokens):
+                            started = True
+                            yield delta
+                return
+            except Exception as e:
+                if started or attempt == MAX_RETRIES or not is_retryable(e):
+                    raise
+                await self._backoff(state, api_key, e, attempt)
+
+    def run(self, coro):
+        """Run a coroutine on the client loop from synchronous code and wait for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def complete(self, prompt, **kwargs):
+        return self.run(self.acomplete(prompt, **kwargs))
+
+    def submit(self, prompt, **kwargs):
+        """Start a completion without waiting; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self.acomplete(prompt, **kwargs), self.loop)
+
+    def stream(self, prompt, **kwargs):
+        """Synchronous generator over astream(), for Streamlit scripts."""
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for delta in self.astream(prompt, **kwargs):
+                    items.put(delta)
+                items.put(_END)
+            except Exception as e:
+                items.put(e)
+
+        asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        while True:
+            item = items.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def complete_many(self, prompts, return_exceptions=False, **kwargs):
+        """Complete several prompts concurrently; results come back in prompt order."""
+        async def gather():
+            return await asyncio.gather(
+                *(self.acomplete(prompt, **kwargs) for prompt in prompts),
+                return_exceptions=return_exceptions,
+            )
+        return self.run(gather())
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+# Pages handed to one worker at a time; smaller documents are parsed inline
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# Page ranges parsed ahead of the consumer; keeps memory flat when embedding is the slower side
+MAX_INFLIGHT_TASKS = int(os.getenv("PDF_MAX_INFLIGHT_TASKS", str(PDF_WORKERS * 2)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # One pool for the whole process; spawn keeps workers clear of Streamlit's threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _extract_range(pdf_path, start, stop):
+    # Runs in a worker process: open the file once and extract a slice of pages
+    reader = PdfReader(pdf_path)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def count_pages(pdf_path):
+    return len(PdfReader(pdf_path).pages)
+
+
+def iter_page_texts(pdf_path, pages_per_task=PAGES_PER_TASK):
+    """Yield the text of every page in page order, parsing page ranges in parallel."""
+    num_pages = count_pages(pdf_path)
+    ranges = [(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)]
+
+    if len(ranges) <= 1 or PDF_WORKERS <= 1:
+        for start, stop in ranges:
+            yield from _extract_range(pdf_path, start, stop)
+        return
+
+    # A new range is submitted only as the oldest one is consumed, so parsing
+    # stays at most MAX_INFLIGHT_TASKS ranges ahead; results come back in order
+    executor = _get_executor()
+    remaining = iter(ranges)
+    inflight = deque()
+    try:
+        for start, stop in remaining:
+            inflight.append(executor.submit(_extract_range, pdf_path, start, stop))
+            if len(inflight) >= max(1, MAX_INFLIGHT_TASKS):
+                break
+        while inflight:
+            page_texts = inflight.popleft().result()
+            next_range = next(remaining, None)
+            if next_range is not None:
+                inflight.append(executor.submit(_extract_range, pdf_path, *next_range))
+            yield from page_texts
+    finally:
+        # The consumer stopped early; don't parse pages nobody will read
+        for future in inflight:
+            future.cancel()
+
+
+def iter_pdf_documents(pdf_path, pages_per_task=PAGES_PER_TASK):
+    """Yield one Document per page, shaped like PyPDFLoader's output."""
+    from langchain.docstore.document import Document
+
+    for page_number, text in enumerate(iter_page_texts(pdf_path, pages_per_task)):
+        yield Document(page_content=text, metadata={"source": pdf_path, "page": page_number})
+
+
+def extract_pdf_text(uploaded_file):
+    """Whole-document text with a newline after every page, as flash cards expect."""
+    if isinstance(uploaded_file, str):
+        return "".join(text + "\n" for text in iter_page_texts(uploaded_file))
+
+    # Worker processes need a path, so uploads are spooled to a temp file first
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+        temp_file.write(uploaded_file.getvalue())
+        temp_file_path = temp_file.name
+    try:
+        return "".join(text + "\n" for text in iter_page_texts(temp_file_path))
+    finally:
+        os.remove(temp_file_path)
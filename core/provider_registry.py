@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Recent call latencies kept per provider for the percentiles
+LATENCY_WINDOW = 200
+# Consecutive failed calls after which a provider is reported unhealthy
+UNHEALTHY_AFTER_ERRORS = int(os.getenv("PROVIDER_UNHEALTHY_AFTER_ERRORS", "3"))
+# Connections kept open to each API host, shared by every client of that provider
+HTTP_MAX_CONNECTIONS = int(os.getenv("PROVIDER_HTTP_MAX_CONNECTIONS", "32"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("PROVIDER_HTTP_MAX_KEEPALIVE", "16"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_HTTP_TIMEOUT_SECONDS", "60"))
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProviderStats:
+    """Call counts, failures and recent latencies of one provider."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.last_error = None
+        self.last_error_at = None
+        self.last_success_at = None
+
+    def record(self, seconds, error=None):
+        self.calls += 1
+        if error is None:
+            self.consecutive_errors = 0
+            self.latencies.append(seconds)
+            self.last_success_at = time.time()
+        else:
+            self.errors += 1
+            self.consecutive_errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"[:200]
+            self.last_error_at = time.time()
+
+    def snapshot(self):
+        latencies = list(self.latencies)
+        return {
+            "healthy": self.consecutive_errors < UNHEALTHY_AFTER_ERRORS,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "p50_ms": _percentile(latencies, 0.5) * 1000 if latencies else None,
+            "p95_ms": _percentile(latencies, 0.95) * 1000 if latencies else None,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at,
+            "last_success_at": self.last_success_at,
+        }
+
+
+class ProviderRegistry:
+    """Process-wide home of LLM and embedding clients.
+
+    Each client is built once, on first use, and handed to every session and
+    Streamlit rerun after that, so its HTTP connection pool (and the TLS
+    sessions in it) is reused instead of being set up per interaction. Calls
+    made through the clients report their latency and failures here.
+    """
+
+    def __init__(self):
+        self.clients = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.build_locks = {}
+
+    def client(self, name, factory):
+        """The client registered under name, built with factory() the first time it is asked for."""
+        with self.lock:
+            if name in self.clients:
+                return self.clients[name]
+            build_lock = self.build_locks.setdefault(name, threading.Lock())
+        # Build outside the registry lock; a slow constructor only blocks callers of the same client
+        with build_lock:
+            with self.lock:
+                if name in self.clients:
+                    return self.clients[name]
+            client = factory()
+            with self.lock:
+                self.clients[name] = client
+                self.build_locks.pop(name, None)
+            return client
+
+    def record(self, provider, seconds, error=None):
+        with self.lock:
+            self.stats.setdefault(provider, ProviderStats()).record(seconds, error)
+
+    @contextmanager
+    def track(self, provider):
+        """Time the calls in the block; an exception counts as a failed call and is re-raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(provider, time.perf_counter() - started, e)
+            raise
+        self.record(provider, time.perf_counter() - started)
+
+    def health(self):
+        """{provider: stats snapshot} plus which clients have been built."""
+        with self.lock:
+            return {
+                "clients": sorted(self.clients),
+                "providers": {provider: stats.snapshot() for provider, stats in self.stats.items()},
+            }
+
+
+def async_http_client():
+    """An httpx client with a bounded keep-alive pool, for the async OpenAI client."""
+    import httpx
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        timeout=HTTP_TIMEOUT_SECONDS,
+    )
+
+
+def http_client():
+    """The synchronous counterpart of async_http_client(), for the embeddings client."""
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        timeout=HTTP_TIMEOUT_SECONDS,
+    )
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProviderRegistry()
+        return _registry
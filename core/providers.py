@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+
+from langchain.embeddings.base import Embeddings
+
+# "openai" for live embeddings, "hashing" for the offline stand-in (chat uses LLM_BACKEND=fake)
+EMBEDDINGS_PROVIDER = os.getenv("EMBEDDINGS_PROVIDER", "openai")
+
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "384"))
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "0"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+# Characters per streamed chunk from the fake chat model
+FAKE_LLM_CHUNK_CHARS = 40
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashed bag-of-words embeddings; no network, no model download."""
+
+    def __init__(self, dim=HASHING_EMBEDDING_DIM):
+        self.dim = dim
+        self.model = f"hashing-bow-{dim}"
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        for word in _WORD.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            # The sign bit keeps colliding words from always adding up
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _build_base_embeddings():
+    if EMBEDDINGS_PROVIDER == "hashing":
+        return HashingEmbeddings()
+    from langchain.embeddings.openai import OpenAIEmbeddings
+    from core.provider_registry import http_client
+    return OpenAIEmbeddings(http_client=http_client())
+
+
+def get_base_embeddings():
+    """The embeddings model named by EMBEDDINGS_PROVIDER, built once per process."""
+    from core.provider_registry import get_provider_registry
+    return get_provider_registry().client(f"embeddings:{EMBEDDINGS_PROVIDER}", _build_base_embeddings)
+
+
+class FakeRateLimitError(Exception):
+    """Raised by the fake chat model to exercise the client's 429 handling."""
+
+    status_code = 429
+
+
+def _sentences(text):
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if len(s.strip().split()) >= 4]
+    return sentences or ["The document describes the main topic of the course"]
+
+
+def _fake_question(rng, sentence, question_id=None):
+    words = sentence.split()
+    # Blank out a content word rather than "a" or "of" where the sentence has one
+    candidates = [i for i, word in enumerate(words) if len(word.strip(".,;:!?")) > 3] or list(range(len(words)))
+    answer_index = rng.choice(candidates)
+    answer = words[answer_index].strip(".,;:!?") or "concept"
+    blanked = " ".join(words[:answer_index] + ["_____"] + words[answer_index + 1:])
+    distractors = [f"{answer}{suffix}" for suffix in ("s", "ing", "ed")]
+    options = [{"option_text": answer, "is_correct": True}] + [
+        {"option_text": text, "is_correct": False} for text in distractors
+    ]
+    rng.shuffle(options)
+    question = {"question": f"Fill in the blank: {blanked[:200]}", "options": options}
+    if question_id is not None:
+        question = {"question_id": question_id, **question}
+    return question
+
+
+def _count(prompt, patterns, default):
+    for pattern in patterns:
+        match = re.search(pattern, prompt)
+        if match:
+            return int(match.group(1))
+    return default
+
+
+def _field(prompt, name):
+    match = re.search(rf'"{name}":\s*"([^"]*)"', prompt)
+    return match.group(1) if match else ""
+
+
+def fake_response(prompt, system=None):
+    """Schema-valid quiz, flashcard, OCR or evaluation output for a prompt, deterministic per prompt."""
+    text = prompt if isinstance(prompt, str) else " ".join(part for part in prompt if isinstance(part, str))
+    rng = random.Random(hashlib.sha256(f"{system or ''}\n{text}".encode("utf-8")).hexdigest())
+
+    # Questions are built from the document text, wherever the prompt put it
+    source = system or text
+    for marker in ("Document section:", "Document text:"):
+        if marker in text:
+            source = text.split(marker, 1)[1]
+    sentences = _sentences(source)
+
+    if "Extract the handwritten text" in text:
+        return " ".join(rng.choice(sentences) for _ in range(3))
+
+    if "Evaluate the following student answers" in text:
+        numbers = re.findall(r"\*Question (.+?):\*", text) or ["1"]
+        return "\n\n".join(
+            f"Question {number}: Score: {rng.randint(0, 5)}/5. Feedback: {rng.choice(sentences)[:120]}"
+            for number in numbers
+        )
+
+    if '"flashcards"' in text:
+        num_cards = _count(text, [r"create (\d+) flashcards"], 5)
+        cards = []
+        for _ in range(num_cards):
+            question = _fake_question(rng, rng.choice(sentences))
+            correct = next(o["option_text"] for o in question["options"] if o["is_correct"])
+            cards.append({
+                "note": rng.choice(sentences)[:300],
+                "question": question["question"],
+                "correct_answer": correct,
+                "incorrect_answers": [o["option_text"] for o in question["options"] if not o["is_correct"]],
+            })
+        return json.dumps({"flashcards": cards})
+
+    num_questions = _count(
+        text, [r"contain (\d+) questions", r"Write (\d+) questions", r"Number of questions: (\d+)"], 5
+    )
+    questions = [_fake_question(rng, rng.choice(sentences), i + 1) for i in range(num_questions)]
+    quiz = {
+        "quiz_id": _field(text, "quiz_id"),
+        "title": "Generated Quiz",
+        "desc": _field(text, "desc"),
+        "subject": _field(text, "subject"),
+        "course_id": _field(text, "course_id"),
+        "questions": questions,
+    }
+    return json.dumps(quiz, indent=2)
+
+
+async def _fake_latency(prompt):
+    delay = FAKE_LLM_LATENCY_MS + random.uniform(0, FAKE_LLM_JITTER_MS)
+    if delay:
+        await asyncio.sleep(delay / 1000)
+    if FAKE_LLM_FAILURE_RATE and random.random() < FAKE_LLM_FAILURE_RATE:
+        raise FakeRateLimitError("Injected failure from the fake chat model")
+
+
+async def fake_complete(prompt, system=None):
+    await _fake_latency(prompt)
+    return fake_response(prompt, system)
+
+
+async def fake_stream(prompt, system=None):
+    await _fake_latency(prompt)
+    text = fake_response(prompt, system)
+    for start in range(0, len(text), FAKE_LLM_CHUNK_CHARS):
+        yield text[start:start + FAKE_LLM_CHUNK_CHARS]
+        await asyncio.sleep(0)
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+from pymongo import ASCENDING, UpdateOne
+
+# 64 MinHash values split into 16 bands of 4 rows: pairs above ~0.5 Jaccard
+# share a band with high probability, pairs below ~0.3 rarely do
+NUM_PERM = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+SHINGLE_CHARS = 5
+# Estimated Jaccard similarity at which a draft question counts as a near-duplicate
+DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.6"))
+
+# Words too common to say what a question is about
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be because been being between both but by can could did do
+does doing during each few for from had has have having how if in into is it its itself just more most no nor
+not of off on once only or other our out over own same should so some such than that the their them then there
+these they this those through to too under until up very was we were what when where which while who whom why
+will with would you your following true false none correct answer question
+""".split())
+
+_MERSENNE_PRIME = (1 << 31) - 1
+# Fixed seed: signatures stored in Mongo must stay comparable across processes
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def normalize_question_text(question):
+    """Question and option text, lowercased and stripped of punctuation; option order doesn't matter."""
+    options = sorted(str(option.get("option_text", "")) for option in question.get("options", []))
+    text = " ".join([str(question.get("question", ""))] + options).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def shingles(text, size=SHINGLE_CHARS):
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(text):
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles(text)],
+        dtype=np.uint64,
+    )
+    # (a * x + b) mod p for every permutation at once; a, x < 2**32 so nothing overflows
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def band_keys(signature):
+    """One key per LSH band; questions sharing any key are duplicate candidates."""
+    rows = signature.reshape(NUM_BANDS, ROWS_PER_BAND)
+    return [
+        f"{band}:{hashlib.blake2b(row.tobytes(), digest_size=8).hexdigest()}"
+        for band, row in enumerate(rows)
+    ]
+
+
+def similarity(signature, other):
+    return float(np.mean(signature == np.asarray(other, dtype=np.uint64)))
+
+
+def content_terms(text):
+    """Distinct content words of a text, for the bank's inverted index."""
+    return sorted({word for word in re.findall(r"[a-z0-9]+", text.lower()) if len(word) > 2 and word not in STOPWORDS})
+
+
+def question_terms(question):
+    correct = [option.get("option_text", "") for option in question.get("options", []) if option.get("is_correct")]
+    return content_terms(" ".join([str(question.get("question", ""))] + correct))
+
+
+def question_fingerprint(question):
+    return hashlib.sha1(normalize_question_text(question).encode("utf-8")).hexdigest()
+
+
+class QuestionBank:
+    """Every posted question of one course, indexed for near-duplicate lookups.
+
+    Each banked question stores its MinHash signature and LSH band keys; the
+    multikey index on bands means a lookup only touches questions sharing a
+    band with the draft question, however large the bank grows. Its content
+    words are indexed the same way so questions can be looked up by topic.
+    """
+
+    def __init__(self, course_db):
+        self.collection = course_db["question_bank"]
+        self.quizzes = course_db["quiz"]
+        self.collection.create_index([("bands", ASCENDING)])
+        self.collection.create_index([("terms", ASCENDING)])
+        self.collection.create_index([("fingerprint", ASCENDING)], unique=True)
+
+    def find_similar(self, question, threshold=DUPLICATE_THRESHOLD, limit=3):
+        """Banked questions whose estimated Jaccard similarity is at least threshold, best first."""
+        signature = minhash_signature(normalize_question_text(question))
+        candidates = self.collection.find(
+            {"bands": {"$in": band_keys(signature)}},
+            {"_id": 0, "question": 1, "options": 1, "signature": 1, "quiz_id": 1},
+        )
+        matches = []
+        for candidate in candidates:
+            score = similarity(signature, candidate.pop("signature"))
+            if score >= threshold:
+                matches.append((score, candidate))
+        matches.sort(key=lambda match: match[0], reverse=True)
+        return matches[:limit]
+
+    def find_duplicates(self, quiz, threshold=DUPLICATE_THRESHOLD):
+        """Near-duplicates in a draft, keyed by question_id.
+
+        Each value has the similarity, the matching question and whether that
+        match is banked; questions repeating an earlier question of the same
+        draft are flagged too. Questions deliberately reused from the bank
+        (marked from_bank) are not checked against it.
+        """
+        duplicates = {}
+        seen = []
+        for question in quiz["questions"]:
+            if question.get("from_bank"):
+                seen.append((question, minhash_signature(normalize_question_text(question))))
+                continue
+            matches = self.find_similar(question, threshold, limit=1)
+            if matches:
+                score, match = matches[0]
+                duplicates[question["question_id"]] = {"similarity": score, "match": match, "banked": True}
+                continue
+            signature = minhash_signature(normalize_question_text(question))
+            for earlier, earlier_signature in seen:
+                score = similarity(signature, earlier_signature)
+                if score >= threshold:
+                    duplicates[question["question_id"]] = {"similarity": score, "match": earlier, "banked": False}
+                    break
+            seen.append((question, signature))
+        return duplicates
+
+    def add_questions(self, questions, quiz_id=None):
+        """Bank posted questions; exact repeats of banked questions are skipped."""
+        now = datetime.utcnow()
+        operations = []
+        for question in questions:
+            signature = minhash_signature(normalize_question_text(question))
+            operations.append(UpdateOne(
+                {"fingerprint": question_fingerprint(question)},
+                {"$setOnInsert": {
+                    "question": question.get("question", ""),
+                    "options": question.get("options", []),
+                    "quiz_id": quiz_id,
+                    "signature": [int(value) for value in signature],
+                    "bands": band_keys(signature),
+                    "terms": question_terms(question),
+                    "created_at": now,
+                }},
+                upsert=True,
+            ))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def import_posted_quizzes(self):
+        """Bank the questions of quizzes posted before the bank existed."""
+        for quiz in self.quizzes.find({}, {"quiz_id": 1, "questions": 1}):
+            self.add_questions(quiz.get("questions", []), quiz.get("quiz_id"))
+
+    def search_terms(self, terms, limit=200):
+        """Banked questions sharing the most content words with terms, best first."""
+        if not terms:
+            return []
+        pipeline = [
+            {"$match": {"terms": {"$in": list(terms)}}},
+            {"$project": {
+                "_id": 0, "question": 1, "options": 1, "quiz_id": 1, "signature": 1,
+                "overlap": {"$size": {"$setIntersection": ["$terms", list(terms)]}},
+            }},
+            {"$sort": {"overlap": -1}},
+            {"$limit": limit},
+        ]
+        return list(self.collection.aggregate(pipeline))
+
+
+def strip_bank_markers(quiz):
+    """The quiz as it is posted, without the from_bank flags used during review."""
+    questions = [{k: v for k, v in question.items() if k != "from_bank"} for question in quiz["questions"]]
+    return dict(quiz, questions=questions)
+
+
+def swap_in_banked(quiz, duplicates):
+    """Replace flagged questions with the banked questions they duplicate, keeping question_ids.
+
+    Duplicates within the draft itself have nothing to swap in and are left as they are.
+    """
+    questions = []
+    for question in quiz["questions"]:
+        duplicate = duplicates.get(question["question_id"])
+        if duplicate and duplicate["banked"]:
+            banked = duplicate["match"]
+            question = {
+                "question_id": question["question_id"],
+                "question": banked["question"],
+                "options": [dict(option) for option in banked["options"]],
+                "from_bank": True,
+            }
+        questions.append(question)
+    return dict(quiz, questions=questions)
+
+
+_banks = {}
+
+
+def get_question_bank(course_db):
+    """One QuestionBank per course database, so its indexes are ensured once per process."""
+    if course_db.name not in _banks:
+        bank = QuestionBank(course_db)
+        if bank.collection.estimated_document_count() == 0:
+            bank.import_posted_quizzes()
+        _banks[course_db.name] = bank
+    return _banks[course_db.name]
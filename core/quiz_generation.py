@@ -0,0 +1,294 @@
+import os
+import tempfile
+
+from core.context_packing import CONTEXT_TOKEN_BUDGET, pack_context
+from core.index_store import get_index_store
+from core.ingest import build_index_streaming
+from core.llm_client import get_llm_client
+from core.quiz_schema import loads_repaired, normalize_question, normalize_quiz, parse_quiz_text, validate_quiz
+from core.response_cache import chunk_id
+
+# Chunking settings for uploaded quiz documents (part of the index cache key)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+QUIZ_MODEL = "gpt-4"
+# Rounds of regenerating questions that still fail validation
+MAX_REPAIR_ROUNDS = 2
+
+# Same instructions RetrievalQA's "stuff" chain gives chat models
+STUFF_SYSTEM_PROMPT = """Use the following pieces of context to answer the user's question. 
+If you don't know the answer, just say that you don't know, don't try to make up an answer.
+----------------
+{context}"""
+
+
+def quiz_json_template(quiz_id, test_description, subject, course_id):
+    return f"""
+    {{
+        "quiz_id": "{quiz_id}",
+        "title": "",
+        "desc": "{test_description}",
+        "subject": "{subject}",
+        "course_id": "{course_id}",
+
+        "questions": [
+            {{
+                "question_id": 1,
+                "question": "",
+                "options": [
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}}
+                ]
+            }},
+            ...
+        ]
+    }}"""
+
+
+def build_quiz_prompt(num_questions, quiz_id, test_description, subject, course_id):
+    return f"""
+    You are a teacher and need to generate a quiz for your class based on the provided document.
+
+    The quiz should contain {num_questions} questions.
+
+    Each question should have 4 options, out of which only one is correct.
+
+    Format the output as a JSON object with the following structure:
+{quiz_json_template(quiz_id, test_description, subject, course_id)}
+
+    Ensure the questions are relevant to the content of the uploaded document.
+                    """
+
+
+def build_feedback_prompt(feedback, num_questions, quiz_id, test_description, subject, course_id):
+    return f''' The previous quiz was discarded due to some reasons. Here is the feedback provided by the teacher : {feedback}. Improve the quiz accordingly.
+
+                Keep the response JSON format the same.
+
+                Number of questions: {num_questions}
+
+{quiz_json_template(quiz_id, test_description, subject, course_id)}
+                '''
+
+
+def get_embeddings():
+    from core.embedding_store import CachedEmbeddings
+    from core.provider_registry import get_provider_registry
+    from core.providers import EMBEDDINGS_PROVIDER, get_base_embeddings
+    # Chunks already embedded by any teacher are served from the shared store;
+    # one wrapper serves every session and rerun
+    return get_provider_registry().client(
+        f"embeddings:cached:{EMBEDDINGS_PROVIDER}", lambda: CachedEmbeddings(get_base_embeddings()),
+    )
+
+
+def index_pdf_bytes(file_bytes, embeddings, on_progress=None):
+    """Return (vector_store, cache_key, cache_hit) for an uploaded PDF.
+
+    The index comes from the shared in-memory store or the on-disk cache when
+    these bytes were indexed before; otherwise the PDF is streamed through
+    chunking and embedding.
+    """
+    def build_index():
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+            temp_file.write(file_bytes)
+            temp_file_path = temp_file.name
+        try:
+            return build_index_streaming(
+                temp_file_path, embeddings,
+                chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                on_progress=on_progress,
+            )
+        finally:
+            os.remove(temp_file_path)
+
+    return get_index_store().load_or_build(
+        file_bytes, embeddings, build_index,
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+    )
+
+
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+def retrieve_context(prompt, retriever, model=QUIZ_MODEL, budget=CONTEXT_TOKEN_BUDGET):
+    """Chunks to stuff into the prompt, packed under a token budget for FAISS-backed retrievers."""
+    vector_store = getattr(retriever, "vectorstore", None)
+    if vector_store is None or not hasattr(vector_store, "index"):
+        return retriever.get_relevant_documents(prompt)
+    search_kwargs = getattr(retriever, "search_kwargs", None) or {}
+    return pack_context(prompt, vector_store, model, budget=budget, filter=search_kwargs.get("filter"))
+
+
+def _context_kwargs(docs):
+    return {
+        "system": STUFF_SYSTEM_PROMPT.format(context=format_docs(docs)),
+        "context_ids": [chunk_id(doc.page_content) for doc in docs],
+    }
+
+
+def check_quiz_text(text):
+    """Raise QuizParseError unless text parses into a quiz; responses that don't are never cached."""
+    normalize_quiz(loads_repaired(text))
+
+
+def complete_with_context(prompt, docs, model=QUIZ_MODEL, bypass_cache=False):
+    """Stuff already-retrieved chunks into one chat completion."""
+    return get_llm_client().complete(
+        prompt, provider="openai", model=model, validate=check_quiz_text,
+        use_cache=True, bypass_cache=bypass_cache, **_context_kwargs(docs),
+    )
+
+
+def stream_with_context(prompt, docs, model=QUIZ_MODEL, bypass_cache=False):
+    yield from get_llm_client().stream(
+        prompt, provider="openai", model=model, validate=check_quiz_text,
+        use_cache=True, bypass_cache=bypass_cache, **_context_kwargs(docs),
+    )
+
+
+def generate_quiz(prompt, retriever, model=QUIZ_MODEL, bypass_cache=False):
+    """Retrieve context for the prompt and "stuff" it into one chat completion.
+
+    Mirrors RetrievalQA's stuff chain but goes through the shared LLM client,
+    so calls respect the process-wide concurrency and rate limits. Repeat
+    requests with the same prompt and retrieved chunks come from the response
+    cache unless bypass_cache is set.
+    """
+    docs = retrieve_context(prompt, retriever)
+    text = complete_with_context(prompt, docs, model=model, bypass_cache=bypass_cache)
+    return {"query": prompt, "result": text, "source_documents": docs}
+
+
+def quiz_defaults(quiz_id, test_description, subject, course_id):
+    # Fields the app already knows; filled in when the model leaves them blank
+    return {"quiz_id": quiz_id, "desc": test_description, "subject": subject, "course_id": course_id}
+
+
+def parse_quiz(result, defaults=None):
+    """Parse and validate a generate_quiz() result; returns (quiz, problems)."""
+    return parse_quiz_text(result['result'], defaults)
+
+
+def build_replacement_prompt(count, avoid_questions, feedback=None):
+    avoid = "\n".join(f"- {question.get('question', '')}" for question in avoid_questions)
+    feedback_text = f"\n    Teacher feedback to take into account: {feedback}\n" if feedback else ""
+    return f"""
+    You are a teacher and need to write additional questions for a quiz based on the provided document.
+
+    Write {count} questions. Do not repeat or rephrase any of these questions already in the quiz:
+{avoid}
+{feedback_text}
+    Each question should have 4 options, out of which only one is correct.
+
+    Format the output as a JSON object with the following structure:
+
+    {{
+        "questions": [
+            {{
+                "question": "",
+                "options": [
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}}
+                ]
+            }},
+            ...
+        ]
+    }}
+    """
+
+
+def regenerate_questions(quiz, question_ids, docs, feedback=None, model=QUIZ_MODEL, bypass_cache=False):
+    """Rewrite only the given questions and splice them back in place.
+
+    The replacement prompt reuses the already-retrieved context docs, so no
+    new retrieval happens and only len(question_ids) questions are written.
+    Every current question, rejected ones included, goes in the avoid list.
+    Returns (quiz, problems) for the spliced quiz; a target the model wrote
+    no replacement for is kept and reported as a problem, so it is retried.
+    """
+    targets = [q["question_id"] for q in quiz["questions"] if q["question_id"] in set(question_ids)]
+    if not targets:
+        return validate_quiz(quiz)
+
+    prompt = build_replacement_prompt(len(targets), quiz["questions"], feedback)
+    text = complete_with_context(prompt, docs, model=model, bypass_cache=bypass_cache)
+    replacements = loads_repaired(text).get("questions", [])
+
+    new_questions = dict(zip(targets, [q for q in replacements if isinstance(q, dict)]))
+    questions = []
+    for question in quiz["questions"]:
+        qid = question["question_id"]
+        if qid in new_questions:
+            questions.append(normalize_question(new_questions[qid], qid))
+        else:
+            questions.append(question)
+
+    quiz = dict(quiz, questions=questions)
+    _, problems = validate_quiz(quiz)
+    for qid in targets:
+        if qid not in new_questions:
+            problems.setdefault(qid, "was not regenerated")
+    return quiz, problems
+
+
+def repair_invalid_questions(quiz, problems, docs, bypass_cache=False, max_rounds=MAX_REPAIR_ROUNDS):
+    """Regenerate just the questions that failed validation, a few rounds at most."""
+    for _ in range(max_rounds):
+        if not problems:
+            break
+        reasons = "; ".join(f"question {qid} {reason}" for qid, reason in problems.items())
+        quiz, problems = regenerate_questions(
+            quiz, list(problems), docs,
+            feedback=f"The previous versions were invalid: {reasons}.", bypass_cache=bypass_cache,
+        )
+    return quiz, problems
+
+
+def run_quiz_job(job, report_progress):
+    """Generate the quiz for a queued job; used by the background job queue."""
+    from core.jobs import read_upload
+
+    report_progress(5, "Indexing document")
+    embeddings = get_embeddings()
+
+    def show_progress(pages_read, chunks_indexed):
+        report_progress(10, f"Indexed {chunks_indexed} chunks from {pages_read} pages")
+
+    vector_store, _, _ = index_pdf_bytes(read_upload(job["pdf_hash"]), embeddings, on_progress=show_progress)
+    if vector_store is None:
+        raise ValueError("Failed to extract content from the uploaded document.")
+
+    report_progress(40, "Generating questions")
+    if job.get("mode") == "sections":
+        from core.section_generation import generate_quiz_by_sections
+
+        def show_sections(done, total, questions):
+            report_progress(40 + 50 * done / total, f"{done} of {total} sections done")
+
+        quiz = generate_quiz_by_sections(
+            vector_store, job["num_questions"], job["quiz_id"], job["test_description"],
+            job["course_name"], job["course_id"], on_section_done=show_sections,
+        )
+        quiz, problems = validate_quiz(quiz)
+        docs = retrieve_context(job["test_description"], vector_store.as_retriever())
+        quiz, _ = repair_invalid_questions(quiz, problems, docs)
+        return quiz
+
+    prompt = build_quiz_prompt(
+        job["num_questions"], job["quiz_id"], job["test_description"],
+        job["course_name"], job["course_id"],
+    )
+    result = generate_quiz(prompt, vector_store.as_retriever())
+
+    report_progress(90, "Validating quiz")
+    defaults = quiz_defaults(job["quiz_id"], job["test_description"], job["course_name"], job["course_id"])
+    quiz, problems = parse_quiz(result, defaults)
+    quiz, _ = repair_invalid_questions(quiz, problems, result["source_documents"])
+    return quiz
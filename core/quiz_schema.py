@@ -0,0 +1,216 @@
+import json
+import re
+
+import fastjsonschema
+
+# The one quiz shape the app stores in Mongo and the student pages read
+OPTION_SCHEMA = {
+    "type": "object",
+    "required": ["option_text", "is_correct"],
+    "properties": {
+        "option_text": {"type": "string", "minLength": 1},
+        "is_correct": {"type": "boolean"},
+    },
+}
+QUESTION_SCHEMA = {
+    "type": "object",
+    "required": ["question_id", "question", "options"],
+    "properties": {
+        "question_id": {"type": "integer"},
+        "question": {"type": "string", "minLength": 1},
+        "options": {"type": "array", "minItems": 4, "maxItems": 4, "items": OPTION_SCHEMA},
+    },
+}
+QUIZ_SCHEMA = {
+    "type": "object",
+    "required": ["quiz_id", "title", "desc", "questions"],
+    "properties": {
+        "quiz_id": {"type": "string"},
+        "title": {"type": "string"},
+        "desc": {"type": "string"},
+        "subject": {"type": "string"},
+        "course_id": {"type": "string"},
+        "questions": {"type": "array"},
+    },
+}
+
+# Compiled once at import; each call is then plain Python checks
+validate_question_schema = fastjsonschema.compile(QUESTION_SCHEMA)
+validate_quiz_schema = fastjsonschema.compile(QUIZ_SCHEMA)
+
+# Field names older prompts and demos used for the canonical ones
+QUIZ_ALIASES = {"description": "desc", "quiz_title": "title", "name": "title", "subject_name": "subject"}
+QUESTION_ALIASES = {"question_text": "question", "text": "question", "prompt": "question", "id": "question_id"}
+OPTION_ALIASES = {"text": "option_text", "option": "option_text", "answer": "option_text",
+                  "correct": "is_correct", "isCorrect": "is_correct", "is_answer": "is_correct"}
+
+
+class QuizParseError(ValueError):
+    """The model output could not be turned into a quiz object at all."""
+
+
+# A JSON string literal; an unterminated one (a truncated response) runs to the end
+_STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*(?:"|$)', re.S)
+
+
+def _outside_strings(text, fix):
+    """Apply fix() to the parts of text that are not JSON string literals, so quiz text is never rewritten."""
+    parts, last = [], 0
+    for match in _STRING_LITERAL.finditer(text):
+        parts.append(fix(text[last:match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(fix(text[last:]))
+    return "".join(parts)
+
+
+def _fix_tokens(text):
+    # Template placeholders copied verbatim from the prompt
+    text = re.sub(r"\b(?:false or true|true or false)\b", "false", text)
+    # Trailing commas before a closing bracket
+    return re.sub(r",\s*([}\]])", r"\1", text)
+
+
+def _fix_python_literals(text):
+    return re.sub(r"\bTrue\b", "true", re.sub(r"\bFalse\b", "false", re.sub(r"\bNone\b", "null", text)))
+
+
+def repair_json_text(text):
+    """Fix the defects LLMs commonly put around or inside JSON, without another round trip."""
+    text = text.strip()
+    # Markdown code fences
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    # Prose before or after the object
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end != -1:
+        text = text[start:end + 1]
+    return _outside_strings(text, _fix_tokens)
+
+
+def loads_repaired(text):
+    """json.loads, falling back to repair_json_text() and then Python-literal fixes."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    repaired = repair_json_text(text)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError:
+        # Python literals are the last common defect; only touch them as a last resort
+        pythonic = _outside_strings(repaired, _fix_python_literals)
+        try:
+            return json.loads(pythonic)
+        except json.JSONDecodeError as e:
+            raise QuizParseError(f"Response is not valid JSON: {e}") from e
+
+
+def _rename(data, aliases):
+    for alias, field in aliases.items():
+        if alias in data and field not in data:
+            data[field] = data.pop(alias)
+    return data
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "1", "correct")
+    return bool(value)
+
+
+def normalize_question(question, question_id=None):
+    question = _rename(dict(question), QUESTION_ALIASES)
+    if question_id is not None or "question_id" not in question:
+        question["question_id"] = question_id if question_id is not None else 0
+    try:
+        question["question_id"] = int(question["question_id"])
+    except (TypeError, ValueError):
+        question["question_id"] = question_id or 0
+
+    options = question.get("options") or []
+    # Plain string options with a separate correct-answer field
+    if options and all(isinstance(option, str) for option in options):
+        answer = question.pop("correct_answer", question.pop("answer", None))
+        options = [{"option_text": option, "is_correct": option == answer} for option in options]
+
+    normalized_options = []
+    for option in options:
+        if not isinstance(option, dict):
+            continue
+        option = _rename(dict(option), OPTION_ALIASES)
+        option["option_text"] = str(option.get("option_text", "")).strip()
+        option["is_correct"] = _as_bool(option.get("is_correct", False))
+        normalized_options.append(option)
+    question["options"] = normalized_options
+    if "question" in question:
+        question["question"] = str(question["question"]).strip()
+    return question
+
+
+def question_problem(question):
+    """Why a normalized question is unusable, or None if it is fine."""
+    try:
+        validate_question_schema(question)
+    except fastjsonschema.JsonSchemaException as e:
+        return e.message
+    correct = sum(1 for option in question["options"] if option["is_correct"])
+    if correct != 1:
+        return f"has {correct} correct options instead of exactly one"
+    texts = [option["option_text"].lower() for option in question["options"]]
+    if len(set(texts)) != len(texts):
+        return "has duplicate options"
+    return None
+
+
+def normalize_quiz(data, defaults=None):
+    if not isinstance(data, dict):
+        raise QuizParseError("Response is not a JSON object")
+    quiz = _rename(dict(data), QUIZ_ALIASES)
+    for field, value in (defaults or {}).items():
+        if not quiz.get(field):
+            quiz[field] = value
+    for field in ("quiz_id", "title", "desc", "subject", "course_id"):
+        if field in quiz or field in QUIZ_SCHEMA["required"]:
+            quiz[field] = "" if quiz.get(field) is None else str(quiz[field])
+
+    questions = quiz.get("questions")
+    if not isinstance(questions, list):
+        raise QuizParseError("Response has no questions list")
+    quiz["questions"] = [
+        normalize_question(question, index + 1)
+        for index, question in enumerate(questions) if isinstance(question, dict)
+    ]
+    try:
+        validate_quiz_schema(quiz)
+    except fastjsonschema.JsonSchemaException as e:
+        raise QuizParseError(f"Quiz {e.message}") from e
+    return quiz
+
+
+def validate_quiz(data, defaults=None):
+    """Normalize a parsed quiz and check every question.
+
+    Returns (quiz, problems) where problems maps question_id to the reason
+    that question failed; only those questions need regenerating.
+    """
+    quiz = normalize_quiz(data, defaults)
+    problems = {}
+    for question in quiz["questions"]:
+        problem = question_problem(question)
+        if problem:
+            problems[question["question_id"]] = problem
+    return quiz, problems
+
+
+def parse_quiz_text(text, defaults=None):
+    """Parse raw model output into (quiz, problems), repairing it locally first."""
+    return validate_quiz(loads_repaired(text), defaults)
+
+
+def parse_question_text(text, question_id=None):
+    """Parse one streamed question object; returns None if it can't be repaired."""
+    try:
+        data = loads_repaired(text)
+    except QuizParseError:
+        return None
+    return normalize_question(data, question_id) if isinstance(data, dict) else None
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Completed LLM responses, keyed by backend + model + rendered prompt + retrieved chunk IDs
+RESPONSE_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite3"))
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+RESPONSE_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "100"))
+
+_lock = threading.Lock()
+_initialized = False
+
+
+def chunk_id(text):
+    """Stable ID for a retrieved chunk, independent of which index it came from."""
+    return hashlib.sha1(re.sub(r"\s+", " ", text).strip().encode("utf-8")).hexdigest()
+
+
+def response_cache_key(model, prompt, system=None, context_ids=None, **options):
+    payload = json.dumps(
+        {
+            "model": model,
+            "prompt": prompt,
+            "system": system,
+            "context_ids": sorted(context_ids or []),
+            "options": options,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect():
+    global _initialized
+    if not _initialized:
+        os.makedirs(os.path.dirname(RESPONSE_CACHE_PATH) or ".", exist_ok=True)
+    connection = sqlite3.connect(RESPONSE_CACHE_PATH, timeout=10)
+    if not _initialized:
+        with _lock:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            connection.commit()
+            _initialized = True
+    return connection
+
+
+def get_response(key):
+    """Return the cached response for key, or None if missing or older than the TTL."""
+    now = time.time()
+    connection = _connect()
+    try:
+        row = connection.execute(
+            "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+            (key, now - RESPONSE_CACHE_TTL_HOURS * 3600),
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        connection.commit()
+        return row[0]
+    finally:
+        connection.close()
+
+
+def put_response(key, response):
+    now = time.time()
+    connection = _connect()
+    try:
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, response, len(response.encode("utf-8")), now, now),
+        )
+        _evict(connection, now)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def delete_response(key):
+    connection = _connect()
+    try:
+        connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _evict(connection, now):
+    connection.execute("DELETE FROM responses WHERE created_at < ?", (now - RESPONSE_CACHE_TTL_HOURS * 3600,))
+
+    # Drop least recently used responses until the cache fits its size limit
+    max_bytes = RESPONSE_CACHE_MAX_MB * 1024 * 1024
+    total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total <= max_bytes:
+        return
+    for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+        if total <= max_bytes:
+            break
+        connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+        total -= size
@@ -0,0 +1,156 @@
+import math
+import re
+from concurrent.futures import as_completed
+
+from core.llm_client import get_llm_client
+from core.quiz_generation import QUIZ_MODEL
+from core.quiz_schema import loads_repaired, normalize_question
+
+# Roughly how many questions one section call should write, and the most calls in flight
+QUESTIONS_PER_SECTION = 3
+MAX_SECTIONS = 8
+# Section text sent per call (~3k tokens)
+MAX_SECTION_CHARS = 12000
+
+
+def get_index_documents(vector_store):
+    """Every chunk stored in a FAISS store, in document order."""
+    docs = [vector_store.docstore.search(doc_id) for doc_id in vector_store.index_to_docstore_id.values()]
+    docs = [doc for doc in docs if hasattr(doc, "page_content")]
+    return sorted(docs, key=lambda doc: (doc.metadata.get("page", 0), doc.metadata.get("start_index", 0)))
+
+
+def partition_sections(docs, num_sections):
+    """Split chunks into contiguous sections holding about the same amount of text."""
+    num_sections = max(1, min(num_sections, len(docs)))
+    target = sum(len(doc.page_content) for doc in docs) / num_sections
+    sections, current, size = [], [], 0
+    for doc in docs:
+        current.append(doc)
+        size += len(doc.page_content)
+        if size >= target and len(sections) < num_sections - 1:
+            sections.append(current)
+            current, size = [], 0
+    if current:
+        sections.append(current)
+    return sections
+
+
+def allocate_questions(num_questions, sections):
+    """Share questions out in proportion to section length (largest remainder)."""
+    sizes = [sum(len(doc.page_content) for doc in section) for section in sections]
+    total = sum(sizes) or 1
+    exact = [num_questions * size / total for size in sizes]
+    counts = [int(value) for value in exact]
+    remainders = sorted(range(len(sections)), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in remainders[:num_questions - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def section_text(section, max_chars=MAX_SECTION_CHARS):
+    # Long sections are sampled evenly so every part of them can be asked about
+    text = "\n\n".join(doc.page_content for doc in section)
+    if len(text) <= max_chars:
+        return text
+    keep = max(1, int(max_chars * len(section) / len(text)))
+    picked = [section[i * len(section) // keep] for i in range(keep)]
+    return "\n\n".join(doc.page_content for doc in picked)[:max_chars]
+
+
+def build_section_prompt(num_questions, text):
+    return f"""
+    You are a teacher and need to write quiz questions for your class based only on the section of the document below.
+
+    Write {num_questions} questions.
+
+    Each question should have 4 options, out of which only one is correct.
+
+    Format the output as a JSON object with the following structure:
+
+    {{
+        "questions": [
+            {{
+                "question": "",
+                "options": [
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}},
+                    {{"option_text": "", "is_correct": false or true}}
+                ]
+            }},
+            ...
+        ]
+    }}
+
+    Document section:
+    {text}
+    """
+
+
+def _parse_questions(text):
+    questions = loads_repaired(text).get("questions", [])
+    return [normalize_question(question) for question in questions if isinstance(question, dict)]
+
+
+def _question_key(question):
+    return re.sub(r"[^a-z0-9]+", " ", str(question.get("question", "")).lower()).strip()
+
+
+def merge_questions(question_lists):
+    """Concatenate section results, drop repeated questions and renumber from 1."""
+    merged, seen = [], set()
+    for questions in question_lists:
+        for question in questions:
+            key = _question_key(question)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(dict(question, question_id=len(merged) + 1))
+    return merged
+
+
+def generate_quiz_by_sections(vector_store, num_questions, quiz_id, test_description, subject, course_id,
+                              model=QUIZ_MODEL, on_section_done=None, bypass_cache=False):
+    """Map-reduce generation: ask each document section for its share of questions in parallel.
+
+    on_section_done(done, total, questions) is called as each section returns.
+    Returns a quiz in the same JSON shape as generate_quiz().
+    """
+    docs = get_index_documents(vector_store)
+    num_sections = min(MAX_SECTIONS, num_questions, math.ceil(num_questions / QUESTIONS_PER_SECTION))
+    sections = partition_sections(docs, num_sections)
+    counts = allocate_questions(num_questions, sections)
+
+    client = get_llm_client()
+    futures = {}
+    for index, (section, count) in enumerate(zip(sections, counts)):
+        if count:
+            prompt = build_section_prompt(count, section_text(section))
+            futures[client.submit(prompt, provider="openai", model=model, validate=_parse_questions,
+                                  use_cache=True, bypass_cache=bypass_cache)] = index
+
+    results = [[] for _ in sections]
+    errors = []
+    for done, future in enumerate(as_completed(futures), start=1):
+        index = futures[future]
+        try:
+            results[index] = _parse_questions(future.result())
+        except Exception as e:
+            errors.append(e)
+        if on_section_done:
+            on_section_done(done, len(futures), results[index])
+
+    # Keep document order in the final quiz, whatever order sections finished in
+    questions = merge_questions(results)[:num_questions]
+    if not questions and errors:
+        raise errors[0]
+
+    return {
+        "quiz_id": quiz_id,
+        "title": f"{subject} - {quiz_id}",
+        "desc": test_description,
+        "subject": subject,
+        "course_id": course_id,
+        "questions": questions,
+    }
@@ -3,7 +3,7 @@ import pymongo
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from pymongo import MongoClient
+from core.db import get_client
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
@@ -52,8 +52,8 @@ st.markdown("""
 # Load environment variables
 load_dotenv()
 
-# MongoDB Connection
-client = MongoClient(os.environ.get('MONGO_DB_URI'))
+# Shared MongoDB client (reused each time Student.py loads this view)
+client = get_client()
 
 # Retrieve student ID and quiz ID from session
 student_id = st.session_state.get("student_id")
@@ -77,7 +77,9 @@ if "test_scores" not in db.list_collection_names():
 collection = db["test_scores"]
 
 # Fetch Student's Test Data
-student_data = list(collection.find({"student_id": student_id}))
+student_data = list(collection.find(
+    {"student_id": student_id}, {"_id": 0, "quiz_id": 1, "score": 1, "total": 1, "timestamp": 1}
+))
 
 if not student_data:
     st.warning(f"⚠️ No test data found for Student ID: {student_id}")
@@ -1,11 +1,11 @@
 import streamlit as st
-import openai
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from PyPDF2 import PdfReader
+from core.llm_client import LLM_BACKEND, get_llm_client
+from core.pdf_extract import extract_pdf_text
 import docx
 import pandas as pd
 import random
@@ -55,9 +55,8 @@ def extract_text(uploaded_file):
         text = uploaded_file.getvalue().decode('utf-8')
     
     elif file_extension == 'pdf':
-        pdf_reader = PdfReader(uploaded_file)
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+        # Pages are extracted in parallel across worker processes
+        text = extract_pdf_text(uploaded_file)
     
     elif file_extension in ['docx', 'doc']:
         doc = docx.Document(uploaded_file)
@@ -71,9 +70,9 @@ def extract_text(uploaded_file):
     return text
 
 # Function to generate flashcards and quizzes
-def generate_flashcards_and_quizzes(text, num_cards=5):
-    # Initialize OpenAI API
-    client = openai.OpenAI(api_key=st.session_state.openai_api_key)
+def generate_flashcards_and_quizzes(text, num_cards=5, bypass_cache=False):
+    # Shared client: pooled keys, rate limits and retries across all students
+    client = get_llm_client()
     
     # Create a prompt for GPT-4o Mini
     prompt = f"""
@@ -103,14 +102,18 @@ def generate_flashcards_and_quizzes(text, num_cards=5):
     """
     
     try:
-        response = client.chat.completions.create(
+        result = client.complete(
+            prompt,
+            provider="openai",
             model="gpt-4o-mini",  # Using GPT-4o Mini
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            # Every student flashcarding the same document gets the cached deck;
+            # a reply without parsable flashcards is not cached
+            use_cache=True,
+            validate=lambda text: json.loads(text)["flashcards"],
+            bypass_cache=bypass_cache,
         )
         
-        result = response.choices[0].message.content
-        
         # Parse JSON response and ensure it has the expected structure
         try:
             parsed_json = json.loads(result)
@@ -198,6 +201,9 @@ def submit_answer(idx, selected_answer, correct_answer, question, note):
 #                        help="Your API key is required to use GPT-4o Mini.")
 
 api_key = os.getenv('OPENAI_API_KEY')
+if LLM_BACKEND == "fake":
+    # The offline stand-in needs no key
+    api_key = api_key or "offline"
 if api_key:
     st.session_state.openai_api_key = api_key
 
@@ -207,6 +213,9 @@ uploaded_file = st.file_uploader("Upload a document (PDF, DOCX, TXT)", type=['pd
 # Number of flashcards selector
 num_cards = st.slider("Number of flashcards to generate", min_value=3, max_value=20, value=5)
 
+# Decks for the same document are shared; this asks for a brand new one
+fresh_deck = st.checkbox("Generate a fresh deck")
+
 # Process button
 if uploaded_file and st.session_state.openai_api_key and st.button("Generate FlashQuiz"):
     with st.spinner("Processing document and generating flashcards..."):
@@ -215,7 +224,7 @@ if uploaded_file and st.session_state.openai_api_key and st.button("Generate Fla
         
         if document_text:
             # Generate flashcards and quizzes
-            flashcards_data = generate_flashcards_and_quizzes(document_text, num_cards)
+            flashcards_data = generate_flashcards_and_quizzes(document_text, num_cards, bypass_cache=fresh_deck)
             
             if flashcards_data is not None:
                 st.session_state.flashcards = flashcards_data
@@ -1,19 +1,17 @@
 import streamlit as st
 import bcrypt
-from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
+from core.db import get_client
 
 # ✅ Load environment variables
 load_dotenv()
 
 # ✅ MongoDB Connection Details
-MONGO_URI = os.getenv("MONGO_DB_URI")
 DB_NAME = "quiz-db"
 STUDENT_COLLECTION = "student_meta"
 
-# ✅ Connect to MongoDB
-client = MongoClient(MONGO_URI)
+# ✅ Shared MongoDB client (reused each time Student.py loads this view)
+client = get_client()
 db = client[DB_NAME]
 student_collection = db[STUDENT_COLLECTION]
 
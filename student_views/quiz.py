@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from pymongo import MongoClient
+from core.db import get_client
+from core.enrollments import get_enrollment_index
 import time
 import os
 from dotenv import load_dotenv
@@ -15,10 +16,9 @@ if not CONNECTION_STRING:
     st.error("MongoDB connection string not found. Please set it in the .env file.")
     st.stop()
 
-@st.cache_resource
 def get_database():
-    client = MongoClient(CONNECTION_STRING)
-    return client
+    # Shared process-wide client
+    return get_client()
 
 student_id = st.session_state.get("student_id")
 
@@ -28,35 +28,56 @@ if not student_id:
 
 def get_quiz_subjects():
     client = get_database()
-    database_names = client.list_database_names()
-    quiz_subjects = []
-    
-    for db_name in database_names:
-        if db_name not in ['admin', 'local', 'config']:
-            db = client[db_name]
-            if "quiz" in db.list_collection_names() and "enroll_stud" in db.list_collection_names():
-                enrolled = db["enroll_stud"].find_one({"student_id": student_id})
-                if enrolled:
-                    quiz_subjects.append(db_name)
-    return quiz_subjects
+    master_db = client["master_db"]
+    enrollment_index = get_enrollment_index(master_db)
+
+    # Enrollments from before the index existed are added once per login
+    if not st.session_state.get("enrollments_backfilled"):
+        enrollment_index.backfill(student_id, master_db["students"], client["quiz-db"]["courses"])
+        st.session_state["enrollments_backfilled"] = True
+
+    return enrollment_index.subjects(student_id)
 
 def load_quizzes(subject):
+    """Listing fields of the subject's quizzes and this student's score on each, in one round trip.
+
+    Questions are left out; load_quiz() fetches them when a quiz is started.
+    """
     client = get_database()
     db = client[subject]
     quiz_collection = db["quiz"]
-    score_collection = db["test_scores"]
 
-    quizzes = list(quiz_collection.find({}, {"_id": 0, "quiz_id": 1, "title": 1, "desc": 1, "questions": 1}))
-
-    for quiz in quizzes:
-        quiz_id = quiz["quiz_id"]
-        score_doc = score_collection.find_one({"student_id": student_id, "quiz_id": quiz_id})
-        quiz["attempted"] = bool(score_doc)
-        if score_doc:
-            quiz["score"] = score_doc["score"]
-            quiz["total"] = score_doc["total"]
+    quizzes = list(quiz_collection.aggregate([
+        {"$project": {"_id": 0, "quiz_id": 1, "title": 1, "desc": 1}},
+        # Only this student's attempt is joined; matched on the (student_id, quiz_id) index
+        {"$lookup": {
+            "from": "test_scores",
+            "localField": "quiz_id",
+            "foreignField": "quiz_id",
+            "pipeline": [
+                {"$match": {"student_id": student_id}},
+                {"$project": {"_id": 0, "score": 1, "total": 1}},
+                {"$limit": 1},
+            ],
+            "as": "attempts",
+        }},
+        {"$project": {
+            "quiz_id": 1,
+            "title": 1,
+            "desc": 1,
+            "attempted": {"$gt": [{"$size": "$attempts"}, 0]},
+            "score": {"$arrayElemAt": ["$attempts.score", 0]},
+            "total": {"$arrayElemAt": ["$attempts.total", 0]},
+        }},
+    ]))
     return pd.DataFrame(quizzes) if quizzes else pd.DataFrame()
 
+def load_quiz(subject, quiz_id):
+    client = get_database()
+    return client[subject]["quiz"].find_one(
+        {"quiz_id": quiz_id}, {"_id": 0, "quiz_id": 1, "title": 1, "desc": 1, "questions": 1}
+    )
+
 def main():
     st.title("Quiz Attempt Page")
     st.subheader("Select a Subject")
@@ -96,6 +117,12 @@ def main():
         st.warning("You are not enrolled in any quiz subjects.")
 
 def start_quiz(quiz, subject):
+    # The listing has no questions; fetch the full quiz only now
+    quiz = load_quiz(subject, quiz["quiz_id"])
+    if not quiz:
+        st.error("This quiz is no longer available.")
+        return
+
     st.session_state["quiz_started"] = True
     st.session_state["current_quiz"] = quiz
     st.session_state["selected_subject"] = subject
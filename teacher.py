@@ -1,34 +1,29 @@
 import streamlit as st
 from dotenv import load_dotenv
-import os
 import re  # To sanitize database names
 from streamlit_option_menu import option_menu
-import tempfile
 from dotenv import load_dotenv
-from langchain.chat_models import ChatOpenAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
-from langchain.document_loaders import PyPDFLoader
-from langchain.chains import RetrievalQA
-from pydantic import BaseModel, ValidationError
-from typing import List
-import json
-from pymongo import MongoClient
-import pandas as pd
-import matplotlib.pyplot as plt
+from core.db import get_client, mongo_uri
+from core.indexes import bootstrap_indexes, ensure_course_indexes
+from core.jobs import get_job_queue, read_upload
+# Heavier dependencies (langchain, FAISS, pandas, matplotlib) are imported in
+# the page branches that use them, so opening the Login page stays fast
 
 
 # Load environment variables
 load_dotenv()
 
 # MongoDB connection
-CONNECTION_STRING = os.getenv("MONGO_DB_URI")
-if not CONNECTION_STRING:
+if not mongo_uri():
     st.error("MongoDB connection string not found. Please set it in the .env file.")
     st.stop()
 
-client = MongoClient(CONNECTION_STRING)
+# Process-wide client; reruns and sessions share its connection pool
+client = get_client()
+bootstrap_indexes(client)
 quiz_db = client["quiz-db"]
+# Started with the app, so jobs left by an earlier process resume without waiting for a page visit
+get_job_queue(quiz_db)
 teachers_collection = quiz_db["teacher_meta"]
 courses_collection = quiz_db["courses"]
 
@@ -126,6 +121,7 @@ if selected == "🏠 Home" and st.session_state.logged_in:
                 course_db.create_collection("quiz")
                 course_db.create_collection("test_scores")
                 course_db.create_collection("enroll_stud")
+                ensure_course_indexes(course_db)
 
                 st.success(f"🎉 Course '{new_course_name}' created successfully!")
                 st.rerun()
@@ -143,6 +139,26 @@ if selected == "🏠 Home" and not st.session_state.logged_in:
 
 
 if selected == "📝 Quiz Generation" and st.session_state.logged_in:
+    from core.quiz_generation import (
+        build_feedback_prompt,
+        build_quiz_prompt,
+        get_embeddings,
+        index_pdf_bytes,
+        quiz_defaults,
+        regenerate_questions,
+        repair_invalid_questions,
+        retrieve_context,
+        stream_with_context,
+    )
+    from core.json_stream import QuizStreamParser
+    from core.bank_retrieval import generate_quiz_from_bank
+    from core.course_index import get_course_index
+    from core.index_store import course_handle, document_handle, resolve_retriever
+    from core.provider_registry import get_provider_registry
+    from core.question_bank import get_question_bank, strip_bank_markers, swap_in_banked
+    from core.quiz_schema import validate_quiz
+    from core.section_generation import generate_quiz_by_sections
+
     teacher_name = st.session_state.teacher_name
     
     # Fetch courses created by the logged-in teacher
@@ -159,28 +175,183 @@ if selected == "📝 Quiz Generation" and st.session_state.logged_in:
         st.warning("You don't have any courses. Please create a course first.")
         st.stop()
     
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4", api_key=os.getenv("OPENAI_API_KEY"))
-
-    # Embeddings    
-    from langchain.embeddings.openai import OpenAIEmbeddings
-    embeddings = OpenAIEmbeddings()
-
-    # Initialize retriever in session state if not already present
-    if 'retriever' not in st.session_state:
-        st.session_state['retriever'] = None
-
-    def generate_quiz(prompt, retriever):
-        if retriever is None:
-            st.error("Retriever is not initialized. Please upload a document and generate a quiz first.")
-            return None
-        
-        rag_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=retriever,
+    # Embeddings client, built once per process and shared by every session
+    embeddings = get_embeddings()
+
+    # Longest quiz the section-parallel mode offers (e.g. for midterms)
+    MAX_SECTION_QUESTIONS = 30
+
+    # Background generation jobs, shared by every teacher session in this process
+    job_queue = get_job_queue(quiz_db)
+
+    # Every document uploaded to this course, indexed together and kept on disk
+    course_index = get_course_index(course_id, embeddings)
+
+    # Earlier questions of this course, for near-duplicate checks
+    question_bank = get_question_bank(client[db_name])
+
+    # Sessions keep a handle to a shared index, not the index itself
+    if 'index_handle' not in st.session_state:
+        st.session_state['index_handle'] = None
+
+    def current_retriever():
+        return resolve_retriever(st.session_state['index_handle'], embeddings)
+
+    def set_generated_quiz(quiz, problems=None):
+        st.session_state['generated_quiz'] = quiz
+        # Questions a regeneration could not fix; shown in the review, still rejected
+        st.session_state['quiz_problems'] = problems or {}
+        # Checked again against the bank on the next render
+        st.session_state.pop('quiz_duplicates', None)
+
+    def show_question(question):
+        st.markdown(f"**Q{question.get('question_id', '')}: {question.get('question', '')}**")
+        for option in question.get("options", []):
+            marker = "✅" if option.get("is_correct") else "▫️"
+            st.write(f"{marker} {option.get('option_text', '')}")
+
+    def quiz_context(query):
+        """Chunks the current quiz was written from, retrieved once per document."""
+        if st.session_state.get('quiz_context') is None:
+            retriever = current_retriever()
+            if retriever is not None:
+                st.session_state['quiz_context'] = retrieve_context(query, retriever)
+        return st.session_state.get('quiz_context')
+
+    def stream_quiz_preview(prompt, title, bypass_cache=False, docs=None):
+        """Render each question as soon as it is complete, then return the whole quiz.
+
+        The live preview is cleared at the end; review_questions() shows the final quiz.
+        """
+        placeholder = st.empty()
+        with placeholder.container():
+            st.subheader(title)
+            preview = st.container()
+        parser = QuizStreamParser()
+        # Kept so questions can be rewritten later without retrieving again
+        if docs is None:
+            docs = retrieve_context(prompt, current_retriever())
+        st.session_state['quiz_context'] = docs
+        with st.spinner("Generating quiz, please wait..."):
+            for delta in stream_with_context(prompt, docs, bypass_cache=bypass_cache):
+                for question in parser.feed(delta):
+                    with preview:
+                        show_question(question)
+        placeholder.empty()
+        return parser.result()
+
+    def validated_quiz(quiz, quiz_id, test_description, bypass_cache=False):
+        """Validate a generated quiz and regenerate only the questions that fail."""
+        defaults = quiz_defaults(quiz_id, test_description, selected_course_name, course_id)
+        quiz, problems = validate_quiz(quiz, defaults)
+        if not problems:
+            return quiz
+
+        st.warning(f"{len(problems)} question(s) were malformed; regenerating just those...")
+        docs = quiz_context(test_description)
+        with st.spinner("Fixing invalid questions..."):
+            quiz, problems = repair_invalid_questions(quiz, problems, docs, bypass_cache=bypass_cache)
+        for question in quiz["questions"]:
+            if question["question_id"] not in problems:
+                continue
+            st.error(f"Question {question['question_id']} is still invalid: {problems[question['question_id']]}")
+        return quiz
+
+    def section_quiz_preview(vector_store, num_questions, quiz_id, test_description, subject, course_id,
+                             bypass_cache=False):
+        """Generate each document section's questions in parallel, showing sections as they finish."""
+        progress = st.progress(0, text="Generating questions for each section...")
+
+        def show_section(done, total, questions):
+            progress.progress(done / total, text=f"{done} of {total} sections done")
+
+        quiz = generate_quiz_by_sections(
+            vector_store, num_questions, quiz_id, test_description, subject, course_id,
+            on_section_done=show_section, bypass_cache=bypass_cache,
         )
-        return rag_chain.invoke(prompt)
+        progress.empty()
+        if len(quiz["questions"]) < num_questions:
+            st.warning(f"Only {len(quiz['questions'])} distinct questions could be generated.")
+        return quiz
+
+    def review_questions(quiz, duplicates):
+        """Show each question with a reject toggle; returns the rejected question_ids."""
+        st.subheader("📝 Review Questions")
+        # Bumped after each regeneration so replaced questions start unticked
+        review_round = st.session_state.setdefault('review_round', 0)
+        problems = st.session_state.get('quiz_problems', {})
+        rejected = []
+        for question in quiz["questions"]:
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                show_question(question)
+                duplicate = duplicates.get(question["question_id"])
+                if duplicate:
+                    source = "a question already in this course" if duplicate["banked"] else "another question in this quiz"
+                    st.caption(f"⚠️ {duplicate['similarity']:.0%} similar to {source}: {duplicate['match']['question']}")
+                problem = problems.get(question["question_id"])
+                if problem:
+                    st.caption(f"❌ Not replaced: this question {problem}")
+            with col2:
+                if st.checkbox("Reject", value=problem is not None,
+                               key=f"reject_{review_round}_{question['question_id']}"):
+                    rejected.append(question["question_id"])
+        return rejected
+
+    def show_course_library():
+        documents = course_index.documents()
+        with st.expander(f"📚 Course library ({len(documents)} documents)"):
+            if not documents:
+                st.caption("Documents you upload for quiz generation are added here.")
+            for document in documents:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(f"{document['name']} · added {document['added_at'][:10]}")
+                with col2:
+                    if st.button("Remove", key=f"remove_doc_{document['doc_hash']}"):
+                        course_index.remove_document(document['doc_hash'])
+                        st.rerun()
+
+    def show_provider_health():
+        providers = get_provider_registry().health()["providers"]
+        if not providers:
+            return
+        with st.expander("🩺 Model providers"):
+            for provider, stats in sorted(providers.items()):
+                status = "✅" if stats["healthy"] else "⚠️"
+                latency = "no successful calls"
+                if stats["p50_ms"] is not None:
+                    latency = f"p50 {stats['p50_ms']:.0f} ms · p95 {stats['p95_ms']:.0f} ms"
+                st.write(f"{status} **{provider}** · {stats['calls']} calls · {stats['errors']} failed · {latency}")
+                if not stats["healthy"] and stats["last_error"]:
+                    st.caption(stats["last_error"])
+
+    @st.fragment(run_every=5)
+    def show_background_jobs():
+        jobs = job_queue.list_jobs(teacher_name, course_id)
+        if not jobs:
+            return
+
+        st.subheader("🗂️ Background Quiz Jobs")
+        for job in jobs:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"**{job['quiz_id'] or 'Untitled'}** · {job['num_questions']} questions · {job['status']}")
+                if job["status"] in ("queued", "running"):
+                    st.progress(job.get("progress", 0), text=job.get("message", ""))
+                elif job["status"] == "failed":
+                    st.caption(f"❌ {job.get('error', 'Unknown error')}")
+            with col2:
+                if job["status"] == "done" and st.button("Review", key=f"review_{job['job_id']}"):
+                    draft = job_queue.get_draft(job["job_id"])
+                    if draft:
+                        # The job's index is cached, so this makes rejected questions regenerable
+                        vector_store, index_key, _ = index_pdf_bytes(read_upload(job["pdf_hash"]), embeddings)
+                        st.session_state['index_handle'] = document_handle(index_key) if vector_store else None
+                        st.session_state['quiz_context'] = None
+                        set_generated_quiz(draft["quiz"])
+                        st.session_state['draft_job_id'] = job["job_id"]
+                        st.rerun(scope="app")
 
     def generate_quiz_page():
         st.title("Generate Quiz")
@@ -188,78 +359,110 @@ if selected == "📝 Quiz Generation" and st.session_state.logged_in:
 
         # User Inputs
         quiz_id = st.text_input("Enter Test ID:")
-        num_questions = st.slider("Number of Questions", min_value=1, max_value=10, value=5)
+        generation_mode = st.radio(
+            "Generation mode",
+            ["Standard", "Section-parallel"],
+            horizontal=True,
+            help="Section-parallel splits the document into sections and writes their questions in parallel. Use it for long quizzes.",
+        )
+        max_questions = MAX_SECTION_QUESTIONS if generation_mode == "Section-parallel" else 10
+        num_questions = st.slider("Number of Questions", min_value=1, max_value=max_questions, value=5)
         test_description = st.text_area("Describe the test:", "Enter a short description of the test.")
         difficulty = st.slider("Difficulty Level", min_value=1, max_value=3, value=2)
+        reuse_bank = st.checkbox(
+            "Reuse questions from this course's question bank",
+            help="Questions already posted to this course that match the document are used first; only the rest are generated.",
+        )
+        bypass_cache = st.checkbox(
+            "Bypass response cache",
+            help="Identical requests are normally answered from cache. Tick this to ask the model again.",
+        )
         quiz_file = st.file_uploader("Upload a document (PDF only):", type=["pdf"])
+        use_course_library = st.checkbox(
+            "Draw on the whole course library",
+            help="Standard mode retrieves from every document uploaded to this course, not just this upload.",
+        )
+        show_course_library()
+
+        col1, col2 = st.columns(2)
+        with col1:
+            generate_clicked = st.button("Generate Quiz")
+        with col2:
+            queue_clicked = st.button("📥 Queue in Background")
 
-        if st.button("Generate Quiz"):
+        if queue_clicked:
             if quiz_file:
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file.write(quiz_file.read())
-                    temp_file_path = temp_file.name
+                job_queue.enqueue(
+                    teacher_name, selected_course, quiz_file.getvalue(),
+                    quiz_id, test_description, num_questions, difficulty,
+                    mode="sections" if generation_mode == "Section-parallel" else "standard",
+                )
+                st.success("Quiz queued! You can keep working or close this tab; the draft will appear below.")
+            else:
+                st.error("Please upload a document before generating a quiz.")
 
+        if generate_clicked:
+            library_retriever = course_index.as_retriever() if use_course_library else None
+            if quiz_file or library_retriever is not None:
                 try:
-                    # Load and split the document
-                    loader = PyPDFLoader(temp_file_path)
-                    docs = loader.load()
-
-                    if not docs:
-                        st.error("Failed to extract content from the uploaded document. Please try another file.")
+                    vector_store = None
+                    if quiz_file:
+                        # Parse, chunk and embed page by page so large textbooks don't spike memory
+                        status = st.empty()
+
+                        def show_progress(pages_read, chunks_indexed):
+                            status.caption(f"Indexed {chunks_indexed} chunks from {pages_read} pages...")
+
+                        # Reuse the index built for these exact bytes and chunking settings
+                        vector_store, index_key, cache_hit = index_pdf_bytes(
+                            quiz_file.getvalue(), embeddings, on_progress=show_progress,
+                        )
+                        status.empty()
+
+                        if vector_store is None:
+                            st.error("Failed to extract content from the uploaded document. Please try another file.")
+                            return
+
+                        if cache_hit:
+                            st.caption("Loaded the document index from cache.")
+                        # Every uploaded document joins the course library
+                        if course_index.add_document(quiz_file.getvalue(), quiz_file.name, vector_store):
+                            st.caption(f"Added {quiz_file.name} to the course library.")
+                            library_retriever = course_index.as_retriever() if use_course_library else None
+
+                    if vector_store is None and (reuse_bank or generation_mode == "Section-parallel"):
+                        st.error("Question bank reuse and section-parallel mode need an uploaded document.")
                         return
 
-                    # Chunking 
-                    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-                    splits = text_splitter.split_documents(docs)
-
-                    # Vector Store - FAISS
-                    vector_store = FAISS.from_documents(splits, embeddings)
-                    st.session_state['retriever'] = vector_store.as_retriever()
-
-                    # Prompt
-                    prompt = f"""
-    You are a teacher and need to generate a quiz for your class based on the provided document.
-
-    The quiz should contain {num_questions} questions.
-
-    Each question should have 4 options, out of which only one is correct.
-
-    Format the output as a JSON object with the following structure:
-
-    {{
-        "quiz_id": "{quiz_id}",
-        "title": "",
-        "desc": "{test_description}",
-        "subject": "{selected_course_name}",
-        "course_id": "{course_id}",
-        
-        "questions": [
-            {{
-                "question_id": 1,
-                "question": "",
-                "options": [
-                    {{"option_text": "", "is_correct": false or true}},
-                    {{"option_text": "", "is_correct": false or true}},
-                    {{"option_text": "", "is_correct": false or true}},
-                    {{"option_text": "", "is_correct": false or true}}
-                ]
-            }},
-            ...
-        ]
-    }}
-
-    Ensure the questions are relevant to the content of the uploaded document.
-                    """
-
-                    st.info("Generating quiz, please wait...")
-                    result = generate_quiz(prompt, st.session_state['retriever'])
-                    if result:
-                        st.success("Quiz generated successfully!")
-                        result_to_send = json.loads(result['result'].strip())
-                        st.session_state['generated_quiz'] = result_to_send
-
-                        # Display quiz preview
-                        st.subheader("📜 Quiz Preview")
+                    st.session_state['index_handle'] = (
+                        course_handle(course_id) if library_retriever is not None else document_handle(index_key)
+                    )
+                    st.session_state['quiz_context'] = None
+
+                    if reuse_bank:
+                        with st.spinner("Searching the question bank..."):
+                            result_to_send, banked_count, docs = generate_quiz_from_bank(
+                                question_bank, vector_store, embeddings, num_questions, quiz_id, test_description,
+                                selected_course_name, course_id, bypass_cache=bypass_cache,
+                            )
+                        st.session_state['quiz_context'] = docs
+                        st.info(f"{banked_count} of {num_questions} questions were reused from the question bank.")
+                    elif generation_mode == "Section-parallel":
+                        result_to_send = section_quiz_preview(
+                            vector_store, num_questions, quiz_id, test_description, selected_course_name, course_id,
+                            bypass_cache=bypass_cache,
+                        )
+                    else:
+                        # Prompt
+                        prompt = build_quiz_prompt(num_questions, quiz_id, test_description, selected_course_name, course_id)
+
+                        # Questions appear in the preview while the rest are still being written
+                        result_to_send = stream_quiz_preview(prompt, "📜 Quiz Preview", bypass_cache=bypass_cache)
+                    result_to_send = validated_quiz(result_to_send, quiz_id, test_description, bypass_cache)
+                    set_generated_quiz(result_to_send)
+                    st.session_state.pop('draft_job_id', None)
+                    st.success("Quiz generated successfully!")
+                    with st.expander("Quiz JSON"):
                         st.json(result_to_send)
                 
                 except Exception as e:
@@ -267,73 +470,109 @@ if selected == "📝 Quiz Generation" and st.session_state.logged_in:
             else:
                 st.error("Please upload a document before generating a quiz.")
 
-        # If a quiz is generated, show Post and Discard buttons
+        # If a quiz is generated, show per-question review and Post and Discard buttons
         if 'generated_quiz' in st.session_state:
+            if st.session_state.get('quiz_duplicates') is None:
+                st.session_state['quiz_duplicates'] = question_bank.find_duplicates(st.session_state['generated_quiz'])
+            duplicates = st.session_state['quiz_duplicates']
+
+            rejected = review_questions(st.session_state['generated_quiz'], duplicates)
+            if duplicates:
+                st.warning(f"{len(duplicates)} question(s) closely match earlier questions.")
+                dup_col1, dup_col2 = st.columns(2)
+                with dup_col1:
+                    if st.button("♻️ Regenerate Duplicates"):
+                        docs = quiz_context(test_description)
+                        if docs is None:
+                            st.error("Retriever is not initialized. Please upload a document and generate a quiz first.")
+                        else:
+                            repeats = "; ".join(duplicate["match"]["question"] for duplicate in duplicates.values())
+                            with st.spinner("Regenerating duplicate questions..."):
+                                quiz, problems = regenerate_questions(
+                                    st.session_state['generated_quiz'], list(duplicates), docs,
+                                    feedback=f"Avoid questions similar to: {repeats}", bypass_cache=bypass_cache,
+                                )
+                                quiz, problems = repair_invalid_questions(quiz, problems, docs, bypass_cache=bypass_cache)
+                            set_generated_quiz(quiz, problems)
+                            st.session_state['review_round'] += 1
+                            st.rerun()
+                with dup_col2:
+                    if any(duplicate["banked"] for duplicate in duplicates.values()) and st.button("📚 Use Banked Versions"):
+                        set_generated_quiz(swap_in_banked(st.session_state['generated_quiz'], duplicates))
+                        st.session_state['review_round'] += 1
+                        st.rerun()
+
+            if rejected:
+                reject_feedback = st.text_input("What should change in the rejected questions? (optional)")
+                if st.button(f"🔁 Regenerate {len(rejected)} Rejected Question(s)"):
+                    docs = quiz_context(test_description)
+                    if docs is None:
+                        st.error("Retriever is not initialized. Please upload a document and generate a quiz first.")
+                    else:
+                        # Only the rejected questions are rewritten; the rest keep their place
+                        with st.spinner("Regenerating rejected questions..."):
+                            quiz, problems = regenerate_questions(
+                                st.session_state['generated_quiz'], rejected, docs,
+                                feedback=reject_feedback or None, bypass_cache=bypass_cache,
+                            )
+                            quiz, problems = repair_invalid_questions(quiz, problems, docs, bypass_cache=bypass_cache)
+                        set_generated_quiz(quiz, problems)
+                        st.session_state['review_round'] += 1
+                        st.rerun()
+
             col1, col2 = st.columns(2)
 
             with col1:
                 if st.button("✅ Post Quiz"):
-                    result_to_send = st.session_state['generated_quiz']
+                    result_to_send = strip_bank_markers(st.session_state['generated_quiz'])
                     
                     # Use the db_name from the selected course
                     subject_db = client[db_name]  # Access subject database using correct db name
                     subject_db["quiz"].insert_one(result_to_send)  # Store in "quiz" collection
+                    question_bank.add_questions(result_to_send.get("questions", []), result_to_send.get("quiz_id"))
                     st.success(f"Quiz successfully stored in '{selected_course_name}' course!")
 
+                    if 'draft_job_id' in st.session_state:
+                        job_queue.mark_draft(st.session_state.pop('draft_job_id'), "posted")
+
                     # Clear session state after posting
                     del st.session_state['generated_quiz']
+                    st.session_state.pop('quiz_duplicates', None)
 
             with col2:
                 if st.button("❌ Discard Quiz"):
                     st.session_state['discarded_quiz'] = st.session_state.pop('generated_quiz')
+                    if 'draft_job_id' in st.session_state:
+                        job_queue.mark_draft(st.session_state.pop('draft_job_id'), "discarded")
                     st.warning("Quiz discarded! Provide feedback for improvement.")
 
         if 'discarded_quiz' in st.session_state:
             st.subheader("💡 Provide Feedback for Quiz Improvement")
             feedback = st.text_area("Enter your feedback on how to improve the quiz:")
             if st.button("🔄 Regenerate Quiz"):
-                new_prompt = f''' The previous quiz was discarded due to some reasons. Here is the feedback provided by the teacher : {feedback}. Improve the quiz accordingly. 
-
-                Keep the response JSON format the same.
-
-                Number of questions: {num_questions}
-                
-    {{
-        "quiz_id": "{quiz_id}",
-        "title": "",
-        "desc": "{test_description}",
-        "subject": "{selected_course_name}",
-        "course_id": "{course_id}",
-        
-        "questions": [
-            {{
-                "question_id": 1,
-                "question": "",
-                "options": [
-                    {{"option_text": "", "is_correct": false or true}},
-                    {{"option_text": "", "is_correct": false or true}},
-                    {{"option_text": "", "is_correct": false or true}},
-                    {{"option_text": "", "is_correct": false or true}}
-                ]
-            }},
-            ...
-        ]
-    }}
-                '''
-                st.info("Regenerating quiz, please wait...")
-                new_result = generate_quiz(new_prompt, st.session_state['retriever'])
-                if new_result:
-                    # st.write(new_result) uncomment and check JSON if validation Error!
-                    result_to_send = json.loads(new_result['result'].strip())
-                    st.session_state['generated_quiz'] = result_to_send
+                new_prompt = build_feedback_prompt(feedback, num_questions, quiz_id, test_description, selected_course_name, course_id)
+                docs = quiz_context(test_description)
+                if docs is None:
+                    st.error("Retriever is not initialized. Please upload a document and generate a quiz first.")
+                else:
+                    # Same context as the discarded quiz; the feedback shouldn't steer retrieval
+                    result_to_send = stream_quiz_preview(
+                        new_prompt, "📜 New Quiz Preview", bypass_cache=bypass_cache, docs=docs,
+                    )
+                    result_to_send = validated_quiz(result_to_send, quiz_id, test_description, bypass_cache)
+                    set_generated_quiz(result_to_send)
                     del st.session_state['discarded_quiz']
                     st.success("Quiz regenerated successfully!")
-                    st.subheader("📜 New Quiz Preview")
-                    st.json(st.session_state['generated_quiz'])
+
+        show_background_jobs()
+        show_provider_health()
 
     generate_quiz_page()
 
 if selected == "📊 Visualization" and st.session_state.logged_in:
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
     st.title("📊 Quiz Performance Visualization")
     
     teacher_name = st.session_state.teacher_name
@@ -1,8 +1,7 @@
-from pymongo import MongoClient
+from core.db import get_database
 
 def get_db():
-    client = MongoClient("mongodb://localhost:27017/")
-    return client["google_classroom"]
+    return get_database("google_classroom", uri="mongodb://localhost:27017/")
 
 def get_teacher_classes(teacher_id):
     db = get_db()
@@ -10,21 +10,24 @@ from langchain.chains import RetrievalQA
 from pydantic import BaseModel, ValidationError
 from typing import List
 import json
-from pymongo import MongoClient
+from core.db import get_client
 
 # Load environment variables
 load_dotenv()
 
 # Initialize MongoDB client
-db_client = MongoClient(os.getenv("MONGO_URI"))
+db_client = get_client(os.getenv("MONGO_URI"))
 db = db_client["quiz-cluster"]
 
 # Initialize LLM
 llm = ChatOpenAI(model="gpt-4", api_key=os.getenv("OPENAI_API_KEY"))
 
 # Embeddings
-from langchain.embeddings.openai import OpenAIEmbeddings
-embeddings = OpenAIEmbeddings()
+from core.quiz_generation import (
+    complete_with_context, get_embeddings, regenerate_questions, repair_invalid_questions, retrieve_context,
+)
+from core.quiz_schema import parse_quiz_text, validate_quiz
+embeddings = get_embeddings()
 
 # Initialize retriever in session state if not already present
 if 'retriever' not in st.session_state:
@@ -42,6 +45,12 @@ def generate_quiz(prompt, retriever):
     )
     return rag_chain.invoke(prompt)
 
+def quiz_context(query):
+    """Chunks the current quiz was written from, retrieved once per document."""
+    if st.session_state.get('quiz_context') is None and st.session_state['retriever'] is not None:
+        st.session_state['quiz_context'] = retrieve_context(query, st.session_state['retriever'])
+    return st.session_state.get('quiz_context')
+
 def generate_quiz_page():
     st.title("Generate Quiz")
     st.write("Upload a document and generate quizzes based on its content.")
@@ -76,6 +85,7 @@ def generate_quiz_page():
                 # Vector Store - FAISS
                 vector_store = FAISS.from_documents(splits, embeddings)
                 st.session_state['retriever'] = vector_store.as_retriever()
+                st.session_state['quiz_context'] = None
 
                 # Prompt
                 prompt = f"""
@@ -127,8 +137,27 @@ Ensure the questions are relevant to the content of the uploaded document.
         else:
             st.error("Please upload a document before generating a quiz.")
 
-    # If a quiz is generated, show Post and Discard buttons
+    # If a quiz is generated, show per-question review and Post and Discard buttons
     if 'generated_quiz' in st.session_state:
+        review_round = st.session_state.setdefault('review_round', 0)
+        rejected = [
+            question["question_id"] for question in st.session_state['generated_quiz'].get("questions", [])
+            if st.checkbox(f"Reject Q{question['question_id']}: {question['question']}",
+                           key=f"reject_{review_round}_{question['question_id']}")
+        ]
+        if rejected and st.button(f"🔁 Regenerate {len(rejected)} Rejected Question(s)"):
+            docs = quiz_context(test_description)
+            if docs is None:
+                st.error("Retriever is not initialized. Please upload a document and generate a quiz first.")
+            else:
+                # Rewrite only the rejected questions from the stored context
+                quiz, _ = validate_quiz(st.session_state['generated_quiz'])
+                quiz, problems = regenerate_questions(quiz, rejected, docs)
+                quiz, problems = repair_invalid_questions(quiz, problems, docs)
+                st.session_state['generated_quiz'] = quiz
+                st.session_state['review_round'] += 1
+                st.rerun()
+
         col1, col2 = st.columns(2)
 
         with col1:
@@ -187,12 +216,18 @@ Ensure the questions are relevant to the content of the uploaded document.
             
             
             '''
-            st.info("Regenerating quiz, please wait...")
-            new_result = generate_quiz(new_prompt, st.session_state['retriever'])
-            if new_result:
-                # st.write(new_result) uncomment and check JSON if validation Error!
-                result_to_send = json.loads(new_result['result'].strip())
-                st.session_state['generated_quiz'] = result_to_send
+            docs = quiz_context(test_description)
+            if docs is None:
+                st.error("Retriever is not initialized. Please upload a document and generate a quiz first.")
+            else:
+                st.info("Regenerating quiz, please wait...")
+                # Same context as the discarded quiz; the feedback shouldn't steer retrieval
+                text = complete_with_context(new_prompt, docs)
+                defaults = {"quiz_id": quiz_id, "desc": test_description, "subject": subject_name}
+                quiz, problems = parse_quiz_text(text, defaults)
+                quiz, _ = repair_invalid_questions(quiz, problems, docs)
+                st.session_state['generated_quiz'] = quiz
+                st.session_state['review_round'] = st.session_state.get('review_round', 0) + 1
                 del st.session_state['discarded_quiz']
                 st.success("Quiz regenerated successfully!")
                 st.subheader("📜 New Quiz Preview")
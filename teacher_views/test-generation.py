@@ -25,8 +25,8 @@ load_dotenv()
 llm = ChatOpenAI(model="gpt-4", api_key=os.getenv("OPENAI_API_KEY"))
 
 # Embeddings
-from langchain.embeddings.openai import OpenAIEmbeddings
-embeddings = OpenAIEmbeddings()
+from core.quiz_generation import get_embeddings
+embeddings = get_embeddings()
 
 # Validation Models
 class OptionModel(BaseModel):
@@ -1,25 +1,24 @@
 import streamlit as st
-import pymongo
-from pymongo import MongoClient
 from streamlit_option_menu import option_menu
 import os
 from dotenv import load_dotenv
 import bcrypt
-import fitz  # PyMuPDF
 import base64
 import re
 from dotenv import load_dotenv
-from mistralai import Mistral
-from mistralai.client import MistralClient
-import time
-from google.generativeai import GenerativeModel, configure  # Specific functions
+import sys
+
+# Shared LLM client lives in the repo root's core package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.db import get_client
+from core.llm_client import get_llm_client
 
 # Load environment variables
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")  # Securely fetch MongoDB URI from .env
 
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
+# Connect to MongoDB through the shared pooled client
+client = get_client(MONGO_URI)
 
 
 # ---------------- Streamlit UI Configuration ----------------
@@ -43,7 +42,6 @@ with st.sidebar:
  
 if selected == "🔑Login/Signup":
     try:
-        client = pymongo.MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
         db = client["teacher"]  # Database for teachers
         collection = db["teacher_metadata"]  # Collection for storing teacher credentials
         client.admin.command('ping')  # Check connection
@@ -285,10 +283,9 @@ elif selected == "📊 Evaluate the Test":
     # Fetch all test collections
     test_ids = teacher_db.list_collection_names()
 
-    # Initialize Gemini API
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    configure(api_key=GEMINI_API_KEY)
-    gemini_model = GenerativeModel("gemini-1.5-pro")
+    # Gemini calls go through the shared client (reads GEMINI_API_KEY)
+    GEMINI_MODEL = "gemini-1.5-pro"
+    llm_client = get_llm_client()
 
     # Student scores database
     students_db = client["student"]
@@ -312,6 +309,7 @@ elif selected == "📊 Evaluate the Test":
 
     # Convert PDF to base64 images using PyMuPDF
     def pdf_to_base64_pymupdf(pdf_path):
+        import fitz  # PyMuPDF; only this page needs it
         doc = fitz.open(pdf_path)
         base64_images = []
         for page_num in range(len(doc)):
@@ -323,16 +321,22 @@ elif selected == "📊 Evaluate the Test":
 
     # Extract text from all images using Gemini API
     def extract_text_from_images(base64_images):
+        st.write(f"Processing {len(base64_images)} pages...")
+        # Pages go out concurrently; the shared client paces them to the Gemini rate limits
+        responses = llm_client.complete_many(
+            [
+                ["Extract the handwritten text from the following image:",
+                 {"mime_type": "image/png", "data": image}]
+                for image in base64_images
+            ],
+            provider="gemini",
+            model=GEMINI_MODEL,
+            return_exceptions=True,
+        )
         full_text = ""
-        for idx, image in enumerate(base64_images):
-            st.write(f"Processing Page {idx+1}...")
-            response = gemini_model.generate_content([
-                "Extract the handwritten text from the following image:",
-                {"mime_type": "image/png", "data": image}
-            ])
-            extracted_text = response.text if response.text else "Text extraction failed"
+        for idx, response in enumerate(responses):
+            extracted_text = response if isinstance(response, str) and response else "Text extraction failed"
             full_text += f"\nPage {idx+1}:\n{extracted_text}\n"
-            time.sleep(3)  # Reduce request frequency
         return full_text
 
     # Group answers based on questions
@@ -369,27 +373,33 @@ elif selected == "📊 Evaluate the Test":
                 f"*Student Answer:* {student_answer}\n\n"
             )
 
-        # Process in chunks (max 3 questions per batch)
+        # Process in chunks (max 3 questions per batch), all batches in flight at once
         chunk_size = 3
-        for i in range(0, len(eval_prompts), chunk_size):
+        batch_starts = list(range(0, len(eval_prompts), chunk_size))
+        batch_prompts = []
+        for i in batch_starts:
             eval_prompt = "Evaluate the following student answers and assign a score out of 5. Provide feedback for each.\n\n"
             eval_prompt += "".join(eval_prompts[i:i+chunk_size])
-            
-            try:
-                response = gemini_model.generate_content(eval_prompt)
-                evaluations = response.text.split("\n\n")  # Assuming Gemini returns responses separated by newline
-                
-                # Match evaluations with questions
-                for idx, question in enumerate(questions_data[i:i+chunk_size]):
-                    q_num = question.get("question_number", "Unknown")
-                    evaluation_result = evaluations[idx] if idx < len(evaluations) else "No Evaluation Found"
-                    results.append({"question_number": q_num, "evaluation": evaluation_result})
-                    st.subheader(f"Evaluation for Question {q_num}:")
-                    st.markdown(evaluation_result)
-
-                time.sleep(5)  # Delay between batches
-            except Exception as e:
-                st.error(f"API Error: {e}")
+            batch_prompts.append(eval_prompt)
+
+        responses = llm_client.complete_many(
+            batch_prompts, provider="gemini", model=GEMINI_MODEL, return_exceptions=True
+        )
+
+        for i, response in zip(batch_starts, responses):
+            if isinstance(response, Exception):
+                st.error(f"API Error: {response}")
+                continue
+
+            evaluations = response.split("\n\n")  # Assuming Gemini returns responses separated by newline
+
+            # Match evaluations with questions
+            for idx, question in enumerate(questions_data[i:i+chunk_size]):
+                q_num = question.get("question_number", "Unknown")
+                evaluation_result = evaluations[idx] if idx < len(evaluations) else "No Evaluation Found"
+                results.append({"question_number": q_num, "evaluation": evaluation_result})
+                st.subheader(f"Evaluation for Question {q_num}:")
+                st.markdown(evaluation_result)
 
         # Store results in MongoDB
         scores_collection.insert_one({
@@ -10,13 +10,17 @@ from langchain.chains import RetrievalQA
 from pydantic import BaseModel, ValidationError
 from typing import List
 import json
-from pymongo import MongoClient
+import sys
+
+# Shared MongoDB client lives in the repo root's core package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.db import get_client
 
 # Load environment variables
 load_dotenv()
 
-# Initialize MongoDB client
-db_client = MongoClient(os.getenv("MONGO_URI"))
+# Connect to MongoDB through the shared pooled client
+db_client = get_client(os.getenv("MONGO_URI"))
 db = db_client["quiz-cluster"]
 
 # Initialize LLM
@@ -1,8 +1,12 @@
 import streamlit as st
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import uuid  # For generating unique course IDs
+import sys
+
+# Shared MongoDB client lives in the repo root's core package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.db import get_client
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,7 +17,8 @@ if not CONNECTION_STRING:
     st.error("MongoDB connection string not found. Please set it in the .env file.")
     st.stop()
 
-client = MongoClient(CONNECTION_STRING)
+# Shared pooled client
+client = get_client(CONNECTION_STRING)
 
 # Database and collections
 quiz_db = client["quiz-db"]
@@ -1,13 +1,17 @@
 import streamlit as st
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+import sys
+
+# Shared MongoDB client lives in the repo root's core package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.db import get_client
 load_dotenv()
 
 # MongoDB connection
 def connect_to_mongo(uri, db_name, collection_name):
     try:
-        client = MongoClient(uri)
+        client = get_client(uri)
         db = client[db_name]
         return db[collection_name]
     except Exception as e:
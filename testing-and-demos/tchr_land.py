@@ -1,5 +1,4 @@
 import streamlit as st
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import re  # To sanitize database names
@@ -14,7 +13,11 @@ from langchain.chains import RetrievalQA
 from pydantic import BaseModel, ValidationError
 from typing import List
 import json
-from pymongo import MongoClient
+import sys
+
+# Shared MongoDB client lives in the repo root's core package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.db import get_client
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -28,7 +31,8 @@ if not CONNECTION_STRING:
     st.error("MongoDB connection string not found. Please set it in the .env file.")
     st.stop()
 
-client = MongoClient(CONNECTION_STRING)
+# Shared pooled client
+client = get_client(CONNECTION_STRING)
 quiz_db = client["quiz-db"]
 teachers_collection = quiz_db["teacher_meta"]
 courses_collection = quiz_db["courses"]
@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from core.embedding_store import EmbeddingStore
+
+DIM = 8
+
+
+def _vector(key):
+    return [float(int(key[-3:]))] * DIM
+
+
+def _keys(worker, count=50):
+    return [f"w{worker}k{i:03d}" for i in range(count)]
+
+
+def _add_from_process(directory, worker):
+    store = EmbeddingStore("model", directory=directory)
+    for key in _keys(worker):
+        store.add_many([(key, _vector(key))])
+
+
+def test_concurrent_processes_keep_rows_aligned(tmp_path):
+    directory = str(tmp_path)
+    processes = [
+        multiprocessing.get_context("fork").Process(target=_add_from_process, args=(directory, worker))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = EmbeddingStore("model", directory=directory)
+    keys = [key for worker in range(4) for key in _keys(worker)]
+    assert len(store) == len(keys)
+    assert store.get_many(keys) == {key: _vector(key) for key in keys}
+
+
+def test_rows_from_another_process_are_picked_up(tmp_path):
+    reader = EmbeddingStore("model", directory=str(tmp_path))
+    EmbeddingStore("model", directory=str(tmp_path)).add_many([("k001", _vector("k001"))])
+    assert reader.get_many(["k001"]) == {"k001": _vector("k001")}
+
+
+def test_partial_writes_from_a_crash_are_dropped(tmp_path):
+    store = EmbeddingStore("model", directory=str(tmp_path))
+    store.add_many([("k001", _vector("k001")), ("k002", _vector("k002"))])
+
+    # A crash mid-append: half a vector and half an index line
+    with open(store.vectors_path, "ab") as f:
+        f.write(np.ones(DIM // 2, dtype=np.float32).tobytes())
+    with open(store.index_path, "a") as f:
+        f.write("k003 2")
+
+    store = EmbeddingStore("model", directory=str(tmp_path))
+    assert os.path.getsize(store.vectors_path) == 2 * DIM * 4
+    store.add_many([("k004", _vector("k004"))])
+    assert store.get_many(["k001", "k003", "k004"]) == {"k001": _vector("k001"), "k004": _vector("k004")}
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+from langchain.vectorstores import FAISS
+
+from core import course_index, index_cache, index_store
+from core.providers import HashingEmbeddings
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(dim=32)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_cache, "INDEX_CACHE_DIR", str(tmp_path / "index_cache"))
+    monkeypatch.setattr(course_index, "COURSE_INDEX_DIR", str(tmp_path / "course_index"))
+    store = index_store.IndexStore()
+    monkeypatch.setattr(index_store, "_store", store)
+    monkeypatch.setattr(course_index, "_indexes", {})
+    return store
+
+
+def _index(embeddings, name, chunks=3):
+    return FAISS.from_texts([f"{name} chunk {i} about cells" for i in range(chunks)], embeddings)
+
+
+def test_concurrent_sessions_build_a_document_once(store, embeddings):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return _index(embeddings, "doc")
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.load_or_build(b"pdf", embeddings, build, 1000, 200)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({id(vector_store) for vector_store, _, _ in results}) == 1
+    assert store.build_locks == {}
+
+
+def test_failed_build_does_not_leave_its_lock(store, embeddings):
+    def build():
+        raise RuntimeError("bad pdf")
+
+    with pytest.raises(RuntimeError):
+        store.load_or_build(b"pdf", embeddings, build, 1000, 200)
+    assert store.build_locks == {}
+
+
+def test_course_index_counts_against_the_budget_and_reloads(store, embeddings):
+    course = course_index.get_course_index("BIO101", embeddings)
+    assert course.add_document(b"a", "a.pdf", _index(embeddings, "a"))
+    assert store.stats()["indexes"] == 1
+    assert store.used == index_store.estimate_index_bytes(course.vector_store)
+
+    # Another index pushes the course out of memory
+    store.max_bytes = store.used
+    store.put("other", _index(embeddings, "other", chunks=5))
+    assert course.store_key not in store.entries
+
+    # It comes back from the course directory, with its chunks intact
+    retriever = course.as_retriever()
+    assert retriever is not None
+    assert course.store_key in store.entries
+    assert course.vector_store.index.ntotal == 3
+
+
+def test_course_changes_survive_eviction(store, embeddings):
+    course = course_index.get_course_index("BIO101", embeddings)
+    course.add_document(b"a", "a.pdf", _index(embeddings, "a"))
+    store.discard(course.store_key)
+    course.add_document(b"b", "b.pdf", _index(embeddings, "b", chunks=2))
+    store.discard(course.store_key)
+    assert course.vector_store.index.ntotal == 5
@@ -0,0 +1,30 @@
+import queue
+import threading
+
+from core import ingest
+
+
+def test_producer_exits_when_the_consumer_stops_with_a_full_queue():
+    out_queue = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    producer = threading.Thread(target=ingest._produce, args=(iter([["a"], ["b"]]), out_queue, stop), daemon=True)
+    producer.start()
+    # The consumer takes one batch and fails; the queue is left full and nobody drains it
+    out_queue.get()
+    threading.Event().wait(0.1)
+    stop.set()
+    producer.join(timeout=2)
+    assert not producer.is_alive()
+
+
+def test_producer_error_reaches_the_consumer():
+    def failing_batches():
+        yield ["a"]
+        raise ValueError("bad page")
+
+    out_queue = queue.Queue(maxsize=1)
+    producer = threading.Thread(target=ingest._produce, args=(failing_batches(), out_queue, threading.Event()))
+    producer.start()
+    assert out_queue.get(timeout=2) == ["a"]
+    assert isinstance(out_queue.get(timeout=2), ValueError)
+    producer.join(timeout=2)
@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from core import jobs
+
+COURSE_TEACHER = "t"
+COURSE = {"course_id": "c", "course_name": "C", "db_name": "c_db"}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    return mongomock.MongoClient()["quiz-db"]
+
+
+def _queue(db, run_job):
+    return jobs.QuizJobQueue(db, run_job, max_workers=1, heartbeat_seconds=0)
+
+
+def _running_job(db, job_id, **fields):
+    db["quiz_jobs"].insert_one({
+        "job_id": job_id, "status": jobs.RUNNING, "worker": "gone-1234", "attempts": 1,
+        "teacher_name": "t", "course_id": "c", "db_name": "c_db",
+        "created_at": datetime.utcnow(), "updated_at": datetime.utcnow(), **fields,
+    })
+
+
+def _wait_for(db, job_id, status):
+    for _ in range(200):
+        job = db["quiz_jobs"].find_one({"job_id": job_id})
+        if job["status"] == status:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"{job_id} stayed {job['status']}")
+
+
+def test_job_of_a_stopped_worker_resumes_once_its_lease_expires(db):
+    # Progress was reported a moment ago, but nothing renews the lease any more
+    _running_job(db, "recent", lease_expires_at=datetime.utcnow() + timedelta(seconds=60))
+    queue = _queue(db, lambda job, report_progress: {"questions": []})
+    assert db["quiz_jobs"].find_one({"job_id": "recent"})["status"] == jobs.RUNNING
+
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    db["quiz_jobs"].update_one({"job_id": "recent"}, {"$set": {"lease_expires_at": expired}})
+    queue.resume()
+    job = _wait_for(db, "recent", jobs.DONE)
+    assert job["worker"] == queue.worker_id
+    assert job["attempts"] == 2
+
+
+def test_running_job_keeps_its_lease_while_the_worker_heartbeats(db):
+    release = threading.Event()
+
+    def slow_job(job, report_progress):
+        release.wait(5)
+        return {"questions": []}
+
+    queue = _queue(db, slow_job)
+    job_id = queue.enqueue(COURSE_TEACHER, COURSE, b"%PDF", "q", "d", 5, "easy")
+    _wait_for(db, job_id, jobs.RUNNING)
+
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    db["quiz_jobs"].update_one({"job_id": job_id}, {"$set": {"lease_expires_at": expired}})
+    queue.renew_leases()
+    queue.resume()
+    assert db["quiz_jobs"].find_one({"job_id": job_id})["status"] == jobs.RUNNING
+
+    release.set()
+    _wait_for(db, job_id, jobs.DONE)
+
+
+def test_worker_that_lost_its_job_does_not_overwrite_the_new_owner(db):
+    release = threading.Event()
+
+    def slow_job(job, report_progress):
+        release.wait(5)
+        return {"questions": []}
+
+    queue = _queue(db, slow_job)
+    job_id = queue.enqueue(COURSE_TEACHER, COURSE, b"%PDF", "q", "d", 5, "easy")
+    _wait_for(db, job_id, jobs.RUNNING)
+    db["quiz_jobs"].update_one({"job_id": job_id}, {"$set": {"worker": "other-5678"}})
+
+    release.set()
+    queue.executor.shutdown(wait=True)
+    assert db["quiz_jobs"].find_one({"job_id": job_id})["status"] == jobs.RUNNING
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from core.json_stream import QuizStreamParser
+from core.quiz_schema import QuizParseError
+
+
+def _quiz_text():
+    questions = [
+        {
+            "question_id": i,
+            "question": f"Which brace {{ or ] closes question {i}?",
+            "options": [{"option_text": t, "is_correct": t == "a"} for t in "abcd"],
+        }
+        for i in (1, 2, 3)
+    ]
+    return json.dumps({"quiz_id": "q1", "title": "T", "desc": "D", "questions": questions})
+
+
+def test_questions_are_emitted_as_they_complete():
+    text = _quiz_text()
+    parser = QuizStreamParser()
+    seen = []
+    for start in range(0, len(text), 7):
+        seen.extend(q["question_id"] for q in parser.feed(text[start:start + 7]))
+    assert seen == [1, 2, 3]
+    assert parser.result() == json.loads(text)
+
+
+def test_truncated_response_falls_back_to_finished_questions():
+    text = _quiz_text()
+    parser = QuizStreamParser()
+    parser.feed(text[:text.index('"question_id": 3')])
+    assert [q["question_id"] for q in parser.result()["questions"]] == [1, 2]
+
+
+def test_nothing_parsable_raises():
+    parser = QuizStreamParser()
+    parser.feed('{"quiz_id": "q1", "questions": [{"question": "unfinished')
+    with pytest.raises(QuizParseError):
+        parser.result()
+
+
+def test_questions_without_ids_are_numbered_in_order():
+    questions = [{"question": f"Q{i}", "options": [{"option_text": "a", "is_correct": True}]} for i in range(3)]
+    parser = QuizStreamParser()
+    seen = [q["question_id"] for q in parser.feed(json.dumps({"questions": questions}))]
+    assert seen == [1, 2, 3]
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from core import llm_client, response_cache
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_PATH", str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(response_cache, "_initialized", False)
+    replies = []
+
+    async def fake_uncached(self, prompt, provider, model, system, max_tokens, response_format):
+        return replies.pop(0)
+
+    monkeypatch.setattr(llm_client.LLMClient, "_acomplete_uncached", fake_uncached)
+    client = llm_client.get_llm_client()
+    client.replies = replies
+    return client
+
+
+def _flashcards(text):
+    return json.loads(text)["flashcards"]
+
+
+def test_unparsable_response_is_not_cached(client):
+    client.replies.extend(["not json", '{"flashcards": []}'])
+    assert client.complete("p", use_cache=True, validate=_flashcards) == "not json"
+    # The broken reply was not stored, so the model is asked again
+    assert client.complete("p", use_cache=True, validate=_flashcards) == '{"flashcards": []}'
+    assert client.complete("p", use_cache=True, validate=_flashcards) == '{"flashcards": []}'
+    assert client.replies == []
+
+
+def test_cached_response_that_no_longer_validates_is_dropped(client):
+    key = llm_client._cache_key("gpt-4", "p", None, None, None, None)
+    response_cache.put_response(key, "truncated {")
+    client.replies.append('{"flashcards": [1]}')
+    assert client.complete("p", use_cache=True, validate=_flashcards) == '{"flashcards": [1]}'
+    assert response_cache.get_response(key) == '{"flashcards": [1]}'
+
+
+def test_cacheable():
+    assert not llm_client.cacheable("")
+    assert llm_client.cacheable("anything")
+    assert not llm_client.cacheable("[]", _flashcards)
+
+
+def test_fake_backend_responses_are_not_served_to_live_requests(client, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_BACKEND", "fake")
+    client.replies.append('{"flashcards": ["fake"]}')
+    assert client.complete("p", use_cache=True) == '{"flashcards": ["fake"]}'
+
+    monkeypatch.setattr(llm_client, "LLM_BACKEND", "live")
+    client.replies.append('{"flashcards": ["live"]}')
+    assert client.complete("p", use_cache=True) == '{"flashcards": ["live"]}'
+    assert client.complete("p", use_cache=True) == '{"flashcards": ["live"]}'
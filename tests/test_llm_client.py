@@ -0,0 +1,22 @@
+import pytest
+
+from core import llm_client
+
+
+@pytest.fixture
+def no_keys(monkeypatch):
+    for name in ("OPENAI_API_KEY", "OPENAI_API_KEYS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(llm_client, "LLM_BACKEND", "live")
+
+
+def test_missing_api_key_is_reported_by_name(no_keys):
+    client = llm_client.LLMClient()
+    with pytest.raises(RuntimeError, match="No API key configured for provider openai"):
+        client.complete("p", provider="openai")
+
+
+def test_missing_api_key_is_reported_when_streaming(no_keys):
+    client = llm_client.LLMClient()
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
+        list(client.stream("p", provider="openai"))
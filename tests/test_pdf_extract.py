@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from core import pdf_extract
+
+
+class CountingExecutor:
+    """Runs tasks on threads and records how many were submitted but not yet consumed."""
+
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(max_workers=2)
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = self.pool.submit(fn, *args)
+        self.futures.append(future)
+        return future
+
+    def pending(self, consumed):
+        return len(self.futures) - consumed
+
+
+def _patch(monkeypatch, num_pages, inflight=3):
+    executor = CountingExecutor()
+    monkeypatch.setattr(pdf_extract, "PDF_WORKERS", 2)
+    monkeypatch.setattr(pdf_extract, "MAX_INFLIGHT_TASKS", inflight)
+    monkeypatch.setattr(pdf_extract, "count_pages", lambda path: num_pages)
+    monkeypatch.setattr(pdf_extract, "_get_executor", lambda: executor)
+    monkeypatch.setattr(pdf_extract, "_extract_range", lambda path, start, stop: [f"page {i}" for i in range(start, stop)])
+    return executor
+
+
+def test_pages_come_back_in_order(monkeypatch):
+    _patch(monkeypatch, num_pages=95)
+    assert list(pdf_extract.iter_page_texts("book.pdf", pages_per_task=10)) == [f"page {i}" for i in range(95)]
+
+
+def test_ranges_are_submitted_as_the_consumer_reads(monkeypatch):
+    executor = _patch(monkeypatch, num_pages=200, inflight=3)
+    pages = pdf_extract.iter_page_texts("book.pdf", pages_per_task=10)
+
+    for consumed_ranges in range(20):
+        for _ in range(10):
+            next(pages)
+        # The range just read is done; at most MAX_INFLIGHT_TASKS more are queued behind it
+        assert executor.pending(consumed_ranges + 1) <= 3
+    assert len(executor.futures) == 20
+
+
+def test_stopping_early_cancels_the_queued_ranges(monkeypatch):
+    executor = _patch(monkeypatch, num_pages=200, inflight=3)
+    pages = pdf_extract.iter_page_texts("book.pdf", pages_per_task=10)
+    next(pages)
+    pages.close()
+    assert len(executor.futures) <= 4
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from core.quiz_schema import (
+    QuizParseError, loads_repaired, parse_quiz_text, question_problem, repair_json_text, validate_quiz,
+)
+
+
+def _option(text, correct=False):
+    return {"option_text": text, "is_correct": correct}
+
+
+def _question(question_id, text="What is 2 + 2?"):
+    return {
+        "question_id": question_id,
+        "question": text,
+        "options": [_option("4", True), _option("3"), _option("5"), _option("22")],
+    }
+
+
+def test_valid_json_is_returned_unchanged():
+    data = {"questions": [_question(1, "Is it true or false that True positives count?")]}
+    assert loads_repaired(json.dumps(data)) == data
+
+
+def test_code_fences_and_prose_are_stripped():
+    text = 'Here is your quiz:\n```json\n{"quiz_id": "q1", "questions": []}\n```\nGood luck!'
+    assert loads_repaired(text) == {"quiz_id": "q1", "questions": []}
+
+
+def test_trailing_commas_are_removed():
+    assert loads_repaired('{"a": [1, 2,], "b": {"c": 1,},}') == {"a": [1, 2], "b": {"c": 1}}
+
+
+def test_placeholder_boolean_becomes_false():
+    text = '{"option_text": "4", "is_correct": true or false}'
+    assert loads_repaired(text) == {"option_text": "4", "is_correct": False}
+
+
+def test_python_literals_are_fixed():
+    assert loads_repaired('{"a": True, "b": False, "c": None}') == {"a": True, "b": False, "c": None}
+
+
+def test_repairs_leave_string_contents_alone():
+    # The trailing comma forces the repair path; the question text must survive it
+    text = (
+        '{"question": "Is it true or false that x, ]", "note": "True positives over all,}",'
+        ' "options": [{"option_text": "None of these", "is_correct": True},],}'
+    )
+    data = loads_repaired(text)
+    assert data["question"] == "Is it true or false that x, ]"
+    assert data["note"] == "True positives over all,}"
+    assert data["options"] == [{"option_text": "None of these", "is_correct": True}]
+
+
+def test_escaped_quotes_do_not_end_a_string():
+    text = r'{"question": "Say \"true or false\", then stop", "n": 1,}'
+    assert loads_repaired(text)["question"] == 'Say "true or false", then stop'
+
+
+def test_repair_json_text_keeps_truncated_string_intact():
+    assert repair_json_text('{"question": "true or false,]') == '{"question": "true or false,]'
+
+
+def test_unrepairable_text_raises():
+    with pytest.raises(QuizParseError):
+        loads_repaired("not json at all")
+
+
+def test_validate_quiz_fills_defaults_and_reports_problems():
+    bad = _question(2)
+    bad["options"][1]["is_correct"] = True
+    quiz, problems = validate_quiz(
+        {"questions": [_question(1), bad]}, {"quiz_id": "q1", "title": "T", "desc": "D"},
+    )
+    assert quiz["quiz_id"] == "q1" and quiz["title"] == "T"
+    assert list(problems) == [2]
+    assert "2 correct options" in problems[2]
+
+
+def test_aliases_and_string_options_are_normalized():
+    text = json.dumps({
+        "quiz_id": "q1", "title": "T", "description": "D",
+        "questions": [{"text": "Pick 4", "options": ["4", "3", "5", "6"], "answer": "4"}],
+    })
+    quiz, problems = parse_quiz_text(text)
+    assert problems == {}
+    assert quiz["desc"] == "D"
+    assert quiz["questions"][0]["question"] == "Pick 4"
+    assert [o["is_correct"] for o in quiz["questions"][0]["options"]] == [True, False, False, False]
+
+
+def test_duplicate_options_are_a_problem():
+    question = _question(1)
+    question["options"][1]["option_text"] = "4"
+    question["options"][1]["is_correct"] = False
+    assert question_problem(question) == "has duplicate options"
@@ -0,0 +1,37 @@
+import json
+
+from core import quiz_generation
+
+
+def _question(question_id, text):
+    return {
+        "question_id": question_id,
+        "question": text,
+        "options": [{"option_text": t, "is_correct": t == "a"} for t in "abcd"],
+    }
+
+
+def _quiz():
+    return {"quiz_id": "q", "title": "T", "desc": "D", "questions": [_question(i, f"old {i}") for i in (1, 2, 3)]}
+
+
+def test_unreplaced_targets_are_reported(monkeypatch):
+    # Two questions were rejected but the model only wrote one replacement
+    reply = json.dumps({"questions": [_question(None, "new")]})
+    monkeypatch.setattr(quiz_generation, "complete_with_context", lambda *args, **kwargs: reply)
+
+    quiz, problems = quiz_generation.regenerate_questions(_quiz(), [1, 3], docs=[])
+
+    assert [q["question"] for q in quiz["questions"]] == ["new", "old 2", "old 3"]
+    assert problems == {3: "was not regenerated"}
+
+
+def test_repair_retries_unreplaced_targets(monkeypatch):
+    replies = iter([json.dumps({"questions": []}), json.dumps({"questions": [_question(None, "new")]})])
+    monkeypatch.setattr(quiz_generation, "complete_with_context", lambda *args, **kwargs: next(replies))
+
+    quiz, problems = quiz_generation.regenerate_questions(_quiz(), [2], docs=[])
+    quiz, problems = quiz_generation.repair_invalid_questions(quiz, problems, docs=[])
+
+    assert problems == {}
+    assert quiz["questions"][1]["question"] == "new"